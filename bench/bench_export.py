@@ -0,0 +1,170 @@
+from pathlib import Path
+from typing import Callable
+import os, sys, json, time, random, shutil, tempfile
+
+# Keep the synthetic platform out of the user's data directory
+DATA_DIR = tempfile.mkdtemp(prefix = "bsneo-bench-")
+os.environ["XDG_DATA_HOME"] = DATA_DIR
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bsneo_scrapi.paths import PATH_META, PATH_MEDIA
+from bsneo_scrapi.platform import PLATFORMS
+from bsneo_scrapi.metadata_store import get_metadata_store
+from bsneo_scrapi.pegasus_exporter import PegasusExporter
+from bsneo_scrapi.region import REGIONS
+from lbpages import random_title
+
+#
+# bench_export
+# Exports a synthetic 5,000 game platform to metadata.pegasus.txt, once the way exports
+# worked with one JSON file per game (read once to copy media, then again to convert it),
+# and once from the metadata store, where each game is loaded once.
+# Reports the fastest of ROUNDS runs, and how much metadata each export read and parsed.
+# The export time is mostly spent creating media folders and copying images, which both
+# exports do alike, so the time to read the metadata alone is reported as well.
+#
+# Usage: python bench/bench_export.py [GAMES]
+#
+
+# Default number of games on the platform
+GAMES = 5000
+
+# Platform the games are exported for
+PID = "nes"
+
+# Asset types of each game, with the number of regional variants of each
+ASSETS = {"boxFront": 3, "boxBack": 2, "logo": 1, "screenshot": 1}
+
+# Size in bytes of each synthetic image
+IMAGE_SIZE = 256
+
+# Times each export is run, alternating between exporters. The fastest run is reported,
+# since copying the media makes single runs depend on the page cache.
+ROUNDS = 3
+
+# Counts the metadata read and parsed during an export
+class MetadataCounter():
+	def __init__(self) -> None:
+		self.reads = 0
+		self.bytes = 0
+		self.loads = json.loads
+
+	def __enter__(self) -> "MetadataCounter":
+		def counting_loads(data, *args, **kwargs):
+			self.reads += 1
+			self.bytes += len(data)
+			return self.loads(data, *args, **kwargs)
+		json.loads = counting_loads
+		return self
+
+	def __exit__(self, *args) -> None:
+		json.loads = self.loads
+
+# The export loop before the metadata store: every game's JSON file is opened and
+# parsed in copy_media, then opened and parsed again for json_to_block.
+class JSONFilePegasusExporter(PegasusExporter):
+	def export_system(self, dest: Path) -> list[str]:
+		meta_blocks = []
+		for meta_file in PATH_META(self.platform.pid).iterdir():
+			with open(meta_file, "r") as meta_content:
+				copied_media = self.copy_media(json.loads(meta_content.read()), dest.parent)
+			with open(meta_file, "r") as meta_content:
+				meta_blocks.append(self.json_to_block(json.loads(meta_content.read()), copied_media))
+
+		meta_blocks.insert(0, {"collection": self.platform.fullname, "shortname": self.platform.pid, "launch": "\"\""})
+		with open(dest, "w") as dest_file:
+			dest_file.writelines(self.blocks_to_file(meta_blocks))
+		return meta_blocks
+
+# Write the games' media, JSON files and metadata store entries.
+def generate_platform(games: int) -> None:
+	rng = random.Random(0)
+	store = get_metadata_store(PID)
+	PATH_META(PID).mkdir(parents = True, exist_ok = True)
+
+	for i in range(games):
+		title = f"{random_title(rng)} {i}"
+		clean_name = f"GAME_{i}"
+		media_dir = PATH_MEDIA(PID).joinpath(clean_name)
+		media_dir.mkdir(parents = True)
+
+		imgs = {}
+		for asset_type, variants in ASSETS.items():
+			imgs[asset_type] = []
+			for region in rng.sample(REGIONS, variants):
+				image_path = media_dir.joinpath(f"{asset_type}_{region}.png")
+				image_path.write_bytes(rng.randbytes(IMAGE_SIZE))
+				imgs[asset_type].append(str(image_path))
+
+		entry = {
+			"platform": PID,
+			"name": title,
+			"clean_name": clean_name,
+			"filename": f"{title}.nes",
+			"desc": " ".join(random_title(rng) for _ in range(40)),
+			"release": "1990-01-01",
+			"developers": [random_title(rng)],
+			"genres": ["Action", "Platform"],
+			"imgs": imgs,
+			"scraped_with": "lb",
+		}
+		PATH_META(PID).joinpath(clean_name + ".json").write_text(json.dumps(entry))
+		store.put(entry)
+
+# Read the metadata the way JSONFilePegasusExporter does: each file twice.
+def read_json_files() -> None:
+	for meta_file in PATH_META(PID).iterdir():
+		for _ in range(2):
+			with open(meta_file, "r") as meta_content:
+				json.loads(meta_content.read())
+
+# Read the metadata the way PegasusExporter does: each entry once.
+def read_store() -> None:
+	for _ in get_metadata_store(PID).entries():
+		pass
+
+# Time a function.
+# return: The elapsed time in milliseconds.
+def time_ms(fn: Callable[[], None]) -> float:
+	start = time.perf_counter()
+	fn()
+	return (time.perf_counter() - start) * 1000
+
+# Run an export into a fresh directory.
+# return: The elapsed time in milliseconds, and the metadata counter.
+def run_export(exporter: PegasusExporter) -> tuple[float, MetadataCounter]:
+	dest_dir = Path(tempfile.mkdtemp(dir = DATA_DIR))
+	with MetadataCounter() as counter:
+		elapsed = time_ms(lambda: exporter.export_system(dest_dir.joinpath("metadata.pegasus.txt")))
+	shutil.rmtree(dest_dir)
+	return (elapsed, counter)
+
+def main() -> None:
+	games = int(sys.argv[1]) if len(sys.argv) > 1 else GAMES
+	try:
+		generate_platform(games)
+
+		exporters = (
+			("JSON files", JSONFilePegasusExporter, read_json_files),
+			("metadata store", PegasusExporter, read_store),
+		)
+		results = {label: ([], []) for label, _, _ in exporters}
+		for _ in range(ROUNDS):
+			for label, exporter_class, read in exporters:
+				exporter = exporter_class(PLATFORMS[PID], "na", False, lambda status: None, lambda msg, level: None)
+				results[label][0].append(run_export(exporter))
+				results[label][1].append(time_ms(read))
+
+		for label, (runs, reads) in results.items():
+			elapsed = min(run[0] for run in runs)
+			counter = runs[0][1]
+			print(
+				f"{label:16} export {elapsed:9.1f} ms, metadata read {min(reads):7.1f} ms, "
+				f"{counter.reads:6} metadata parses, {counter.bytes / (1024 * 1024):7.2f} MB parsed"
+			)
+	finally:
+		shutil.rmtree(DATA_DIR)
+
+if __name__ == "__main__":
+	main()
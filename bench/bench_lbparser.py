@@ -0,0 +1,91 @@
+from pathlib import Path
+import sys, time, random
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bsneo_scrapi.lbparser import LB_PARSERS, get_parser
+from lbpages import search_page, details_page, images_page
+
+#
+# bench_lbparser
+# Compares the per-page parse time of each LaunchBox parser backend.
+#
+# Usage: python bench/bench_lbparser.py [FIXTURE_DIR]
+# FIXTURE_DIR may hold pages saved from LaunchBox, named search*.html, details*.html
+# and images*.html. It defaults to the real pages saved by save_lbpages.py, and
+# synthetic pages are generated if there are none.
+# Exits with status 1 if the backends disagree on any page.
+#
+
+# Real pages saved by save_lbpages.py
+REAL_FIXTURE_DIR = Path(__file__).resolve().parent.joinpath("fixtures", "lbpages")
+
+# Number of times each page is parsed
+ROUNDS = 20
+
+# Load the fixture pages, grouped by page type.
+def load_pages(fixture_dir: Path) -> dict[str, list[str]]:
+	pages = {}
+	for kind in ("search", "details", "images"):
+		pages[kind] = [path.read_text() for path in sorted(fixture_dir.glob(f"{kind}*.html"))]
+	return pages
+
+# Generate synthetic fixture pages, grouped by page type.
+def generate_pages() -> dict[str, list[str]]:
+	rng = random.Random(0)
+	return {
+		"search": [search_page(rng) for _ in range(5)],
+		"details": [details_page(rng) for _ in range(5)],
+		"images": [images_page(rng) for _ in range(5)],
+	}
+
+# Parse and extract a page with the given backend.
+def extract(parser, kind: str, content: str):
+	tree = parser.parse(content)
+	if kind == "search":
+		return (parser.search_cards(tree), parser.is_last_page(tree))
+	if kind == "details":
+		return parser.metadata_fields(tree)
+	return parser.image_links(tree)
+
+def main() -> None:
+	fixture_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else REAL_FIXTURE_DIR
+	pages = load_pages(fixture_dir) if fixture_dir.is_dir() else {}
+	if sum(len(kind_pages) for kind_pages in pages.values()) == 0:
+		print(f"No saved pages in {fixture_dir}, using synthetic pages. Run bench/save_lbpages.py to save real ones.")
+		pages = generate_pages()
+
+	parsers = [get_parser(name) for name in LB_PARSERS]
+	parsers = [parser for i, parser in enumerate(parsers) if parser.name not in [p.name for p in parsers[:i]]]
+
+	mismatches = 0
+
+	for kind in pages:
+		if len(pages[kind]) == 0:
+			continue
+
+		# Check that every backend extracts the same values, page by page
+		results = [[extract(parser, kind, content) for content in pages[kind]] for parser in parsers]
+		for parser, result in zip(parsers[1:], results[1:]):
+			for i in range(len(pages[kind])):
+				if result[i] != results[0][i]:
+					print(f"MISMATCH: {parser.name} and {parsers[0].name} disagree on {kind} page {i + 1}")
+					mismatches += 1
+
+		# Time each backend
+		baseline = None
+		for parser in parsers:
+			start = time.perf_counter()
+			for _ in range(ROUNDS):
+				for content in pages[kind]:
+					extract(parser, kind, content)
+			per_page = (time.perf_counter() - start) / (ROUNDS * len(pages[kind])) * 1000
+			if baseline == None:
+				baseline = per_page
+			print(f"{kind:8} {parser.name:5} {per_page:8.2f} ms/page  ({baseline / per_page:.1f}x)")
+
+	if mismatches > 0:
+		sys.exit(1)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,141 @@
+from pathlib import Path
+import os, sys, time, random, re, tempfile
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bsneo_scrapi.platform import PLATFORMS
+from bsneo_scrapi.pegasus_exporter import PegasusExporter, LIST_TYPE_FIELD_PREFIXES
+from lbpages import random_title
+
+#
+# bench_pegasus_parser
+# Reads a synthetic 10,000 entry metadata.pegasus.txt file with read_existing_metadata,
+# compared with the previous readlines() and string concatenation parser.
+# Also checks that both return the same blocks.
+#
+# Usage: python bench/bench_pegasus_parser.py [ENTRIES]
+#
+
+# Default number of game entries in the file
+ENTRIES = 10000
+
+# Lines of description of each game, and how many paragraphs they are split in
+DESC_LINES = 60
+DESC_PARAGRAPHS = 4
+
+# Platform of the collection block
+PID = "nes"
+
+# read_existing_metadata before it was streamed
+def read_existing_metadata_reference(existing_file: Path) -> list[dict]:
+	def is_list_type_field(field: str) -> bool:
+		for prefix in LIST_TYPE_FIELD_PREFIXES:
+			if prefix in field:
+				return True
+		return False
+
+	def add_data_to_field(data_section: dict, field: str, data: str) -> None:
+		list_type_field = is_list_type_field(field)
+		if field in data_section:
+			if list_type_field:
+				data_section[field].append(data)
+			else:
+				data_section[field] += data
+		else:
+			if list_type_field:
+				data_section[field] = [] if data == "" else [data]
+			else:
+				data_section[field] = data
+
+	metadata_lines = []
+	with open(existing_file, "r") as metadata_file:
+		metadata_lines_raw = metadata_file.readlines()
+		i = 0
+		current_field = ""
+		nl = False
+		for line in metadata_lines_raw:
+			if line.strip(" ") == "\n":
+				if not nl:
+					i += 1
+					current_field = ""
+					nl = True
+			elif line[0] != "#":
+				nl = False
+				if len(metadata_lines) == i:
+					metadata_lines.append({})
+				if re.match(r"\s", line) == None:
+					field = line[:line.index(":")].strip(" ")
+					data = line[line.index(":") + 1:-1].strip(" ")
+					add_data_to_field(metadata_lines[i], field, data)
+					current_field = field
+				else:
+					new_data = line.strip(" ")[:-1]
+					if new_data == ".":
+						add_data_to_field(metadata_lines[i], current_field, "\n\n")
+					else:
+						add_data_to_field(metadata_lines[i], current_field, new_data)
+	return metadata_lines
+
+# Write a metadata.pegasus.txt file with the given number of games, as PegasusExporter writes it.
+def generate_file(exporter: PegasusExporter, path: Path, entries: int) -> None:
+	rng = random.Random(0)
+	blocks = [{"collection": PLATFORMS[PID].fullname, "shortname": PID, "launch": "\"\""}]
+	for i in range(entries):
+		title = f"{random_title(rng)} {i}"
+		paragraphs = [
+			"".join(random_title(rng) + " " for _ in range(DESC_LINES // DESC_PARAGRAPHS))
+			for _ in range(DESC_PARAGRAPHS)
+		]
+		blocks.append({
+			"game": title,
+			"file": [f"{title}.nes"],
+			"description": "\n\n".join(paragraphs),
+			"release": "1990-01-01",
+			"developers": [random_title(rng)],
+			"genres": ["Action", "Platform"],
+			"assets.boxFront": f"media/GAME_{i}/boxFront.png",
+			"assets.logo": f"media/GAME_{i}/logo.png",
+		})
+
+	lines = exporter.blocks_to_file(blocks)
+	# Split descriptions over several lines, as hand edited files and other tools do
+	with open(path, "w") as metadata_file:
+		for line in lines:
+			if line.startswith("description: "):
+				words = line[:-1].split(" ")
+				metadata_file.write(words[0] + " " + words[1] + "\n")
+				for word in words[2:]:
+					metadata_file.write(f"  {word} \n")
+			else:
+				metadata_file.write(line)
+
+# Time a function.
+# return: The elapsed time in milliseconds, and the function's result.
+def time_call(function, *args) -> tuple[float, object]:
+	start = time.perf_counter()
+	result = function(*args)
+	return ((time.perf_counter() - start) * 1000, result)
+
+def main() -> None:
+	entries = int(sys.argv[1]) if len(sys.argv) > 1 else ENTRIES
+	exporter = PegasusExporter(PLATFORMS[PID], "na", False, lambda status: None, lambda msg, level: None)
+
+	fd, path = tempfile.mkstemp(suffix = ".pegasus.txt")
+	os.close(fd)
+	path = Path(path)
+	try:
+		generate_file(exporter, path, entries)
+		size = path.stat().st_size / (1024 * 1024)
+
+		reference_time, reference = time_call(read_existing_metadata_reference, path)
+		streamed_time, streamed = time_call(exporter.read_existing_metadata, path)
+
+		print(f"{entries} entries, {size:.1f} MB")
+		print(f"previous parser {reference_time:9.1f} ms")
+		print(f"streamed parser {streamed_time:9.1f} ms ({reference_time / streamed_time:.1f}x)")
+		print(f"same blocks: {reference == streamed}")
+	finally:
+		path.unlink()
+
+if __name__ == "__main__":
+	main()
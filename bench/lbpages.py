@@ -0,0 +1,65 @@
+import random
+
+#
+# lbpages
+# Synthetic LaunchBox pages for benchmarks, following the structure LBScraper parses.
+# Real pages saved from gamesdb.launchbox-app.com can be used instead where a benchmark allows it.
+#
+
+WORDS = ["Super", "Mario", "Legend", "Zelda", "Dragon", "Quest", "Final", "Fantasy", "Sonic", "Street", "Fighter", "Mega", "Man", "Castle", "Metroid", "Kirby", "Star", "Fox", "Racing", "World", "Adventure", "Island", "Tales", "II", "III"]
+
+IMAGE_TITLES = ["Box - Front", "Box - Back", "Box - Spine", "Box - 3D", "Cart - Front", "Clear Logo", "Background Image", "Screenshot - Gameplay", "Screenshot - Game Title", "Fanart - Box - Front", "Banner"]
+
+REGIONS = ["North America", "Europe", "Japan", "United States", "World", "France", "Germany", "Brazil"]
+
+# Get a random game title.
+def random_title(rng: random.Random) -> str:
+	title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+	if rng.random() < 0.3:
+		title += ": " + " ".join(rng.choice(WORDS) for _ in range(2))
+	if rng.random() < 0.2:
+		title += " (" + rng.choice(REGIONS) + ")"
+	return title
+
+# Wrap page contents with the page chrome surrounding them on LaunchBox.
+def page(body: str) -> str:
+	nav = "".join(f'<li><a href="/nav/{i}">Link {i}</a></li>' for i in range(60))
+	return f'<!DOCTYPE html><html><head><title>LaunchBox Games Database</title><script>var x = 1;</script></head><body><nav><ul>{nav}</ul></nav><main>{body}</main><footer><p>Footer</p></footer></body></html>'
+
+# Get a search page with the given number of cards.
+def search_page(rng: random.Random, cards: int = 100, last: bool = False) -> str:
+	body = ""
+	for i in range(cards):
+		game_id = rng.randint(1, 999999)
+		body += f'<div class="games-grid-card col"><a href="/games/details/{game_id}-game"><img src="/img/{game_id}.jpg"></a><div class="cardTitle"><h3>{random_title(rng)}</h3><p>Nintendo Entertainment System</p></div></div>'
+	body += '<div class="pagination"><span class="current">1</span>'
+	if last:
+		body += '<span class="current next">Next</span>'
+	body += '</div>'
+	return page(body)
+
+# Get a details page.
+def details_page(rng: random.Random) -> str:
+	title = random_title(rng)
+	lists = ""
+	for heading in ("Genres", "Developers", "Publishers"):
+		links = "".join(f'<a href="/x/{i}">{rng.choice(WORDS)} {rng.choice(WORDS)}</a>' for i in range(rng.randint(1, 3)))
+		lists += f'<div class="detailCard"><h5>{heading}</h5>{links}</div>'
+	desc = " ".join(rng.choice(WORDS) for _ in range(400))
+	return page(
+		f'<section class="heroSection"><div><h1>{title}</h1></div></section>'
+		f'<span id="yourRatingShort">{rng.randint(1, 50) / 10}</span>'
+		f'<div class="infoCards row"><div class="card"><div class="cardHeading"><span>Release Date</span></div><h6>March {rng.randint(1, 28)}, 19{rng.randint(80, 99)}</h6></div></div>'
+		f'{lists}<div class="detailCard"><h5>Overview</h5><p>{desc}\r\n{desc}</p></div>'
+		f'<div class="detailCard"><h5>Video</h5><a href="https://youtu.be/x">https://www.youtube.com/watch?v=x</a></div>'
+	)
+
+# Get an images page with the given number of images.
+def images_page(rng: random.Random, images: int = 40) -> str:
+	links = ""
+	for i in range(images):
+		title = rng.choice(IMAGE_TITLES)
+		if rng.random() < 0.8:
+			title += f" ({rng.choice(REGIONS)})"
+		links += f'<a href="https://images.launchbox-app.com/{i:08x}-{rng.randint(0, 99999)}.png" data-title="{title}"><img src="/thumb/{i}.png"></a>'
+	return page(f'<div class="image-list row">{links}</div>')
@@ -0,0 +1,62 @@
+from pathlib import Path
+import sys, time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bsneo_scrapi.http_client import HTTPClient
+from bsneo_scrapi.lbparser import get_parser
+from bsneo_scrapi.platform import PLATFORMS
+
+#
+# save_lbpages
+# Saves real LaunchBox pages as fixtures for bench_lbparser: the first and last search pages
+# of a platform, and the details and images pages of a few games on the first one.
+#
+# Usage: python bench/save_lbpages.py [PLATFORM_ID] [GAMES]
+# The pages are written to bench/fixtures/lbpages/, replacing any saved before.
+#
+
+# Directory the pages are saved to
+FIXTURE_DIR = Path(__file__).resolve().parent.joinpath("fixtures", "lbpages")
+
+# Seconds between two requests, to stay polite to LaunchBox
+REQUEST_INTERVAL = 1.0
+
+# LaunchBox URL prefix
+LB_BASE = "https://gamesdb.launchbox-app.com"
+
+# Request a page and save it as a fixture.
+# return: The page's contents.
+def save_page(http: HTTPClient, link: str, name: str) -> str:
+	print(f"Saving {link} as {name}")
+	response = http.get_page(link)
+	response.raise_for_status()
+	FIXTURE_DIR.joinpath(name).write_text(response.text)
+	time.sleep(REQUEST_INTERVAL)
+	return response.text
+
+def main() -> None:
+	platform = PLATFORMS[sys.argv[1] if len(sys.argv) > 1 else "nes"]
+	games = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+	FIXTURE_DIR.mkdir(parents = True, exist_ok = True)
+	http = HTTPClient(15, 15)
+	parser = get_parser("bs4")
+	url_base = f"{LB_BASE}/platforms/games/{platform.launchbox_id}/page/"
+
+	# First search page, and the games whose pages are saved
+	cards = parser.search_cards(parser.parse(save_page(http, url_base + "1", "search1.html")))
+	for i, (title, details_link) in enumerate(cards[:games]):
+		save_page(http, LB_BASE + details_link, f"details{i + 1}.html")
+		save_page(http, LB_BASE + details_link.replace("/details/", "/images/"), f"images{i + 1}.html")
+
+	# Last search page, found by stepping through the pages
+	page = 2
+	while True:
+		content = save_page(http, url_base + str(page), "search2.html")
+		if parser.is_last_page(parser.parse(content)):
+			break
+		page += 1
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,252 @@
+from pathlib import Path
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+import os, asyncio, hashlib, tempfile, threading
+
+try:
+	import aiohttp
+except ImportError:
+	aiohttp = None
+
+from .paths import *
+from .options import get_option
+from .http_client import HTTP_RETRIES, HTTP_BACKOFF, HTTP_RETRY_CODES
+from .info_compiler import InfoCompiler, MEDIA_NETWORK_TIMEOUT, MEDIA_CHUNK_SIZE, MEDIA_ENTRY_LOOKAHEAD
+
+#
+# AsyncInfoCompiler
+# InfoCompiler which downloads every image of every entry as coroutines on one event loop
+#
+
+# Constants
+# Default maximum number of images downloaded at the same time
+MEDIA_ASYNC_LIMIT = 32
+
+# Default maximum number of images downloaded from a single host at the same time
+MEDIA_HOST_LIMIT = 8
+
+# Names of the media engines, as accepted by the "media_engine" setting
+MEDIA_ENGINES = ("threaded", "async")
+
+class AsyncInfoCompiler(InfoCompiler):
+	# Takes the same arguments as InfoCompiler.
+	# Images are downloaded with aiohttp if it is installed. Otherwise, the blocking
+	# download_image runs on a thread pool, limited in the same way.
+	def __init__(self, *args, **kwargs) -> None:
+		super().__init__(*args, **kwargs)
+
+		# Maximum number of images downloaded at the same time, and from a single host
+		self.async_limit: int = max(1, get_option(self.settings, "media_async_limit", MEDIA_ASYNC_LIMIT))
+		self.host_limit: int = max(1, get_option(self.settings, "media_host_limit", MEDIA_HOST_LIMIT))
+
+		# Semaphores created by process(), one global and one per host
+		self.global_semaphore: asyncio.Semaphore = None
+		self.host_semaphores: dict[str, asyncio.Semaphore] = {}
+
+		# Event loop and task of the running process() call, used by cancel()
+		self.loop: asyncio.AbstractEventLoop = None
+		self.main_task: asyncio.Task = None
+		self.cancel_lock = threading.Lock()
+
+	# Get the semaphore limiting the downloads from the host of a link.
+	def host_semaphore(self, link: str) -> asyncio.Semaphore:
+		host = urlsplit(link).hostname or ""
+		if not host in self.host_semaphores:
+			self.host_semaphores[host] = asyncio.Semaphore(self.host_limit)
+		return self.host_semaphores[host]
+
+	# Stream an image to a temporary file, then move it into place.
+	# session: The aiohttp session to download with.
+	# return: None if the image was downloaded, or the delay in seconds before the download
+	#   should be retried. Raises an exception if the download failed for good.
+	async def fetch_image(self, session, link: str, image_path: Path) -> float:
+		temp_fd, temp_name = tempfile.mkstemp(prefix = image_path.name + ".", suffix = ".part", dir = self.get_image_temp_dir(image_path))
+		try:
+			async with session.get(link) as image_data:
+				if image_data.status in HTTP_RETRY_CODES:
+					retry_after = image_data.headers.get("Retry-After", "")
+					return float(retry_after) if retry_after.isdigit() else -1
+				if image_data.status != 200:
+					raise IOError(f"Server returned code {image_data.status}")
+
+				written = 0
+				digest = hashlib.sha256()
+				with os.fdopen(temp_fd, "wb") as image_file:
+					temp_fd = None
+					async for chunk in image_data.content.iter_chunked(MEDIA_CHUNK_SIZE):
+						image_file.write(chunk)
+						digest.update(chunk)
+						written += len(chunk)
+
+				# Check that the whole image arrived (only possible if the body is not re-encoded)
+				expected = image_data.headers.get("Content-Length")
+				if expected != None and image_data.headers.get("Content-Encoding", "identity") == "identity" and int(expected) != written:
+					raise IOError(f"Expected {expected} bytes, received {written}")
+
+			self.place_image(temp_name, digest.hexdigest(), link, image_path)
+			return None
+		finally:
+			if temp_fd != None:
+				os.close(temp_fd)
+			Path(temp_name).unlink(missing_ok = True)
+
+	# Download an image, like InfoCompiler.download_image, as a coroutine.
+	# session: The aiohttp session to download with, or None to use download_image on a thread.
+	# return: The same as download_image.
+	async def download_image_async(self, session, link: str, asset_type: str, region: str, game_name: str) -> Path:
+		if session == None:
+			async with self.global_semaphore, self.host_semaphore(link):
+				return await asyncio.to_thread(self.download_image, link, asset_type, region, game_name)
+
+		image_path: Path = self.get_image_path(link, asset_type, region, game_name)
+		if image_path.exists():
+			self.output(f"Image {image_path.name} Already Exists", 0)
+			return image_path
+		if self.store != None and self.store.link_url(link, image_path):
+			self.output(f"Image {image_path.name} Found in Media Store", 0)
+			return image_path
+
+		for attempt in range(HTTP_RETRIES + 1):
+			try:
+				async with self.global_semaphore, self.host_semaphore(link):
+					self.output(f"Downloading Image from URL: {link}", -1)
+					retry_delay = await self.fetch_image(session, link, image_path)
+			except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+				retry_delay = -1
+				error = e
+			except Exception as e:
+				self.output(f"Image Download Failed: {e}", 1)
+				return None
+			else:
+				error = "Server kept returning an error"
+
+			if retry_delay == None:
+				self.output(f"Successfully Downloaded {link}", 0)
+				return image_path
+
+			# Back off before retrying, outside of the semaphores so other downloads may proceed
+			if attempt < HTTP_RETRIES:
+				await asyncio.sleep(retry_delay if retry_delay >= 0 else HTTP_BACKOFF * 2 ** attempt)
+
+		self.output(f"Image Download Failed: {error}", 1)
+		return None
+
+	# Download an image and report progress.
+	# return: The same as download_image.
+	async def download_queued_image_async(self, session, link: str, asset_type: str, region: str, game_name: str) -> Path:
+		self.update_status({"media_current": asset_type, "media_region": region})
+
+		image_path = await self.download_image_async(session, link, asset_type, region, game_name)
+		if image_path != None:
+			self.media_progress += 1
+			self.update_status({"media_progress": self.media_progress})
+
+		return image_path
+
+	# Download the images of an entry, then complete it like InfoCompiler.finish_entry.
+	# scraped_with: The scraper service used for this entry.
+	async def process_entry(self, session, entry: dict, scraped_with: str) -> None:
+		check_path(PATH_MEDIA(self.platform.pid).joinpath(entry["clean_name"]))
+
+		for asset_type in entry["imgs"]:
+			image_paths = await asyncio.gather(*[
+				self.download_queued_image_async(session, image_url, asset_type, image_region, entry["clean_name"])
+				for image_url, image_region in entry["imgs"][asset_type]
+			])
+			entry["imgs"][asset_type] = [str(image_path) for image_path in image_paths if image_path != None]
+
+		self.complete_entry(entry, scraped_with)
+
+	# Process the entries concurrently. The semaphores bound how many images are actually downloading,
+	# and how many entries are taken in ahead of them.
+	async def process_async(self, metadata: dict) -> None:
+		self.global_semaphore = asyncio.Semaphore(self.async_limit)
+		self.host_semaphores = {}
+
+		session = None
+		if aiohttp != None:
+			timeout = aiohttp.ClientTimeout(total = None, sock_connect = MEDIA_NETWORK_TIMEOUT, sock_read = MEDIA_NETWORK_TIMEOUT)
+			connector = aiohttp.TCPConnector(limit = self.async_limit, limit_per_host = self.host_limit)
+			session = aiohttp.ClientSession(timeout = timeout, connector = connector)
+		else:
+			self.output("The async media engine needs aiohttp, which is not installed (pip install aiohttp). Downloading images on threads instead.", 1)
+			asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers = self.async_limit))
+
+		entries = iter(metadata["entries"])
+		entry_slots = asyncio.Semaphore(self.async_limit * MEDIA_ENTRY_LOOKAHEAD)
+		entry_tasks: set[asyncio.Task] = set()
+
+		# Frees the slot of a finished entry
+		def entry_done(entry_task: asyncio.Task) -> None:
+			entry_tasks.discard(entry_task)
+			entry_slots.release()
+
+		try:
+			while True:
+				await entry_slots.acquire()
+
+				# Entries of a stream arrive as they are scraped, so wait for them on a thread
+				if self.entries_sized:
+					entry = next(entries, None)
+				else:
+					entry = await asyncio.to_thread(next, entries, None)
+				if entry == None:
+					break
+
+				self.receive_entry()
+				self.apply_media_policy(entry)
+				self.media_total += sum(len(entry["imgs"][asset_type]) for asset_type in entry["imgs"])
+				self.update_status({"media_total": self.media_total, "media_progress": self.media_progress})
+
+				entry_task = asyncio.create_task(self.process_entry(session, entry, metadata["scraped_with"]))
+				entry_tasks.add(entry_task)
+				entry_task.add_done_callback(entry_done)
+
+			self.end_entries()
+			await asyncio.gather(*entry_tasks)
+		except asyncio.CancelledError:
+			for entry_task in entry_tasks:
+				entry_task.cancel()
+			await asyncio.gather(*entry_tasks, return_exceptions = True)
+			raise
+		finally:
+			if session != None:
+				await session.close()
+
+	# Stop a running process() call. Safe to call from any thread.
+	# Entries already written are kept, and partially downloaded images are removed.
+	def cancel(self) -> None:
+		super().cancel()
+		with self.cancel_lock:
+			self.cancelled = True
+			if self.main_task != None:
+				self.loop.call_soon_threadsafe(self.main_task.cancel)
+
+	# Processes all "entries" entries in the given metadata dict, and downloads images.
+	# Produces the same metadata files as InfoCompiler.process.
+	def process(self, metadata: dict) -> None:
+		self.start_entries(metadata["entries"])
+		self.start_video_thread()
+
+		async def run() -> None:
+			with self.cancel_lock:
+				if self.cancelled:
+					return
+				self.loop = asyncio.get_running_loop()
+				self.main_task = asyncio.current_task()
+			await self.process_async(metadata)
+
+		try:
+			asyncio.run(run())
+		except asyncio.CancelledError:
+			self.output("Media download was cancelled.", 1)
+		finally:
+			with self.cancel_lock:
+				self.loop = None
+				self.main_task = None
+			if self.video_queue != None:
+				self.video_queue.close()
+
+		self.update_status({"media_current": "none"})
+		self.start_background()
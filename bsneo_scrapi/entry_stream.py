@@ -0,0 +1,98 @@
+from typing import Iterator
+import queue, threading
+
+from .scraper import Scraper
+
+#
+# EntryStream
+# Runs a scraper on its own thread and hands over its entries as they are scraped,
+# so that the info compiler can download media while the search continues.
+#
+
+# Constants
+# Default maximum number of scraped entries waiting for the info compiler.
+# Once full, the scraper waits, which keeps memory use bounded.
+ENTRY_QUEUE_SIZE = 64
+
+# Seconds between checks for a closed stream while the queue is full
+ENTRY_QUEUE_POLL = 0.1
+
+# Raised in the scraper's thread once the stream is closed, to stop the scrape
+class EntryStreamClosed(Exception):
+	pass
+
+class EntryStream():
+	# Marks the end of the stream in the queue
+	END = object()
+
+	# scraper: The scraper to run. Its scrape() must accept an on_entry function.
+	# max_queued: The maximum number of entries waiting to be consumed.
+	def __init__(self, scraper: Scraper, max_queued: int = ENTRY_QUEUE_SIZE) -> None:
+		self.scraper = scraper
+		self.queue = queue.Queue(maxsize = max(1, max_queued))
+		self.closed = threading.Event()
+		self.thread: threading.Thread = None
+
+		# The dict returned by scrape() once it finished, without its entries.
+		# None if it did not finish.
+		self.result: dict = None
+
+		# The exception raised by scrape(), if any
+		self.error: BaseException = None
+
+	# Start scraping.
+	def start(self) -> None:
+		self.thread = threading.Thread(target = self.run, name = "bsneo-scrape", daemon = True)
+		self.thread.start()
+
+	# Run the scraper. Runs on the stream's thread.
+	def run(self) -> None:
+		try:
+			self.result = self.scraper.scrape(self.put)
+		except EntryStreamClosed:
+			pass
+		except BaseException as e:
+			self.error = e
+		finally:
+			self.put(EntryStream.END)
+
+	# Queue an entry, waiting while the queue is full.
+	# Raises EntryStreamClosed if the stream was closed.
+	def put(self, entry: dict) -> None:
+		while not self.closed.is_set():
+			try:
+				self.queue.put(entry, timeout = ENTRY_QUEUE_POLL)
+				return
+			except queue.Full:
+				continue
+
+		if entry is not EntryStream.END:
+			raise EntryStreamClosed()
+
+	# Yield the entries as they are scraped, until the scrape has finished.
+	# Raises the scraper's exception, if it raised one.
+	def __iter__(self) -> Iterator[dict]:
+		while True:
+			entry = self.queue.get()
+			if entry is EntryStream.END:
+				break
+			yield entry
+
+		self.thread.join()
+		if self.error != None:
+			raise self.error
+
+	# Stop the scrape if it is still running, and wake up a waiting consumer. Safe to call from any thread.
+	def close(self) -> None:
+		self.closed.set()
+		self.scraper.stop()
+		while True:
+			try:
+				self.queue.put_nowait(EntryStream.END)
+				return
+			except queue.Full:
+				# Drop the waiting entries, they are not consumed anymore
+				try:
+					self.queue.get_nowait()
+				except queue.Empty:
+					pass
@@ -0,0 +1,135 @@
+from pathlib import Path
+import os, json, hashlib, threading
+
+from .paths import *
+
+#
+# ExportManifest
+# Record of the media an exporter placed in an export destination, kept next to the exported file.
+# Lets a re-export skip the images whose source did not change, and remove the images
+# which no exported game uses anymore.
+#
+
+# Constants
+# Name of the manifest file, in the export destination folder
+EXPORT_MANIFEST_NAME = ".bsneo_export.json"
+
+# Size in bytes of the chunks in which files are hashed
+HASH_CHUNK_SIZE = 64 * 1024
+
+# Get the SHA-256 hash of a file.
+def hash_file(path: Path) -> str:
+	digest = hashlib.sha256()
+	with open(path, "rb") as hashed_file:
+		while chunk := hashed_file.read(HASH_CHUNK_SIZE):
+			digest.update(chunk)
+	return digest.hexdigest()
+
+class ExportManifest():
+	# dest_dir: The export destination folder. Media paths are recorded relative to it.
+	# hash_media: Whether to record the hash of each source file. An image whose size and
+	#   modification time changed is then still skipped if its contents did not.
+	def __init__(self, dest_dir: Path, hash_media: bool = False) -> None:
+		self.dest_dir = dest_dir
+		self.path: Path = dest_dir.joinpath(EXPORT_MANIFEST_NAME)
+		self.hash_media = hash_media
+		self.lock = threading.Lock()
+
+		# Placed media by relative path, as {"src": ..., "size": ..., "mtime": ..., "mode": ..., "requested": ..., "hash": ...}
+		# "mode" is how the file was actually placed, "requested" the export media mode it was placed with.
+		self.files: dict[str, dict] = {}
+		if self.path.exists():
+			try:
+				with open(self.path, "r") as manifest_file:
+					self.files = json.loads(manifest_file.read())
+			except (OSError, ValueError):
+				self.files = {}
+
+		# Media placed or found unchanged during this export
+		self.seen: set[str] = set()
+
+	# Get the manifest key of a media file in the destination.
+	def key(self, dest: Path) -> str:
+		return dest.relative_to(self.dest_dir).as_posix()
+
+	# Check whether dest still holds src as placed by a previous export. Thread safe.
+	# src_stat: The result of os.stat(src).
+	# mode: The export media mode dest would be placed with.
+	# return: True if dest can be left as is.
+	def unchanged(self, src: Path, src_stat: os.stat_result, dest: Path, mode: str) -> bool:
+		key = self.key(dest)
+		with self.lock:
+			record = self.files.get(key)
+		if record == None or record["src"] != str(src) or record.get("requested", record["mode"]) != mode:
+			return False
+
+		# The placed file must still be there, and copies must still be whole
+		try:
+			dest_stat = os.lstat(dest)
+		except OSError:
+			return False
+		if record["mode"] in ("copy", "reflink") and dest_stat.st_size != src_stat.st_size:
+			return False
+
+		if record["size"] == src_stat.st_size and record["mtime"] == src_stat.st_mtime_ns:
+			# Records made before hashing was enabled get their hash now
+			digest = hash_file(src) if self.hash_media and not "hash" in record else None
+			with self.lock:
+				if digest != None:
+					record["hash"] = digest
+				self.seen.add(key)
+			return True
+
+		# The source was touched, but may have the same contents
+		if self.hash_media and "hash" in record and record["size"] == src_stat.st_size and hash_file(src) == record["hash"]:
+			with self.lock:
+				record["mtime"] = src_stat.st_mtime_ns
+				self.seen.add(key)
+			return True
+
+		return False
+
+	# Record that src was placed at dest. Thread safe.
+	# requested: The export media mode dest was placed with.
+	# mode: How dest was actually placed, which differs from requested after a fallback to copying.
+	def record(self, src: Path, src_stat: os.stat_result, dest: Path, requested: str, mode: str) -> None:
+		key = self.key(dest)
+		record = {"src": str(src), "size": src_stat.st_size, "mtime": src_stat.st_mtime_ns, "mode": mode, "requested": requested}
+		if self.hash_media:
+			record["hash"] = hash_file(src)
+		with self.lock:
+			self.files[key] = record
+			self.seen.add(key)
+
+	# Delete the recorded media which was neither placed during this export nor is in keep,
+	# along with game folders left empty.
+	# keep: Relative paths of media still used by the exported file.
+	# return: The number of deleted files.
+	def prune(self, keep: set[str]) -> int:
+		removed = 0
+		for key in list(self.files):
+			if key in self.seen or key in keep:
+				continue
+
+			media_path = self.dest_dir.joinpath(key)
+			try:
+				media_path.unlink(missing_ok = True)
+			except OSError:
+				continue
+			del self.files[key]
+			removed += 1
+
+			try:
+				media_path.parent.rmdir()
+			except OSError:
+				pass
+
+		return removed
+
+	# Write the manifest to its file.
+	def save(self) -> None:
+		check_path(self.dest_dir)
+		temp_path = self.path.with_name(self.path.name + ".part")
+		with open(temp_path, "w") as manifest_file:
+			manifest_file.write(json.dumps(self.files))
+		os.replace(temp_path, self.path)
@@ -1,17 +1,50 @@
 from pathlib import Path
 from typing import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
 
-import json, shutil
+import os, time, shutil, threading
 
 from .paths import *
 from .region import *
 from .platform import Platform
+from .options import get_option
+from .export_manifest import ExportManifest
+from .metadata_store import MetadataStore, get_metadata_store
 
 #
 # Exporter
 # Base Class for all exporters
 #
 
+# Constants
+# Ways of placing exported media, as accepted by the "export_media_mode" setting:
+# "copy" copies each image, "hardlink" and "symlink" link to the scraped image, and "reflink"
+# uses copy_file_range, which shares the data on file systems that support it (Btrfs, XFS).
+# Any mode other than "copy" falls back to copying when the destination is on another device,
+# or when the file system does not support it.
+EXPORT_MEDIA_MODES = ("copy", "hardlink", "reflink", "symlink")
+
+# Default number of media files placed at the same time during an export
+EXPORT_WORKERS = 4
+
+# Minimum seconds between two media copy status updates
+EXPORT_STATUS_INTERVAL = 0.5
+
+# Copy a file with copy_file_range, letting the file system share its data if it can.
+# Raises OSError if copy_file_range is unavailable or unsupported between these files.
+def reflink_file(src: Path, dest: Path) -> None:
+	if not hasattr(os, "copy_file_range"):
+		raise OSError("copy_file_range is not available")
+
+	with open(src, "rb") as src_file, open(dest, "wb") as dest_file:
+		remaining = os.fstat(src_file.fileno()).st_size
+		while remaining > 0:
+			copied = os.copy_file_range(src_file.fileno(), dest_file.fileno(), remaining)
+			if copied == 0:
+				break
+			remaining -= copied
+	shutil.copymode(src, dest)
+
 class Exporter():
 	# Platform for which games belong to.
 	platform: Platform = None
@@ -30,12 +63,44 @@ class Exporter():
 	# Status update function
 	send_status: Callable[dict, None] = None
 
+	# Optional worker settings, read with options.get_option
+	settings: dict = {}
+
 	# Assign values
-	def __init__(self, platform: Platform, base_region: str, strict_region: bool, send_status: Callable[dict, None], output: Callable[..., None]) -> None:
+	def __init__(self, platform: Platform, base_region: str, strict_region: bool, send_status: Callable[dict, None], output: Callable[..., None], settings: dict = {}) -> None:
 		# Init Exporter Settings
 		self.platform = platform
+		self.meta_store: MetadataStore = get_metadata_store(platform.pid)
 		self.base_region = base_region
 		self.strict_region = strict_region
+		self.settings = settings
+
+		# How exported media is placed, one of EXPORT_MEDIA_MODES
+		self.media_mode: str = get_option(self.settings, "export_media_mode", "copy")
+		if not self.media_mode in EXPORT_MEDIA_MODES:
+			self.media_mode = "copy"
+
+		# Manifest of the media placed in the destination during an export, unless the
+		# export_manifest setting is False. Opened by open_manifest.
+		self.manifest: ExportManifest = None
+
+		# Number of media files placed at the same time
+		self.export_workers: int = max(1, get_option(self.settings, "export_workers", EXPORT_WORKERS))
+
+		# Media copy pool, created by start_media_copy. Without it, media is placed one file at a time.
+		self.copy_pool: ThreadPoolExecutor = None
+		self.copy_lock = threading.Lock()
+
+		# Media copy progress, reported with send_status
+		self.copy_total: int = 0
+		self.copy_done: int = 0
+		self.copy_bytes: int = 0
+		self.copy_start: float = 0.0
+		self.copy_last_status: float = 0.0
+		self.copy_error: BaseException = None
+
+		# Preferred regions, in order
+		self.pref_reg: list[str] = get_preferred_regions(base_region)
 
 		# Status and Output functions for worker class
 		self.send_status = send_status
@@ -44,48 +109,37 @@ class Exporter():
 	# Copies over all media files for a single game given the game's name and a media identifier.
 	# By default, the file is copied over with the same name, excluding the region code.
 	# rename can be used to rename the copied file.
-	# meta_file: The bsneo metadata JSON for this game
+	# metadata: The bsneo metadata of this game, as read from the metadata store
 	# dest: The destination media folder. Files will be copied into {dest}/media/{game}/
 	# rename: A dictionary with media identifiers as keys and new names as values. The file's
 	#   media identifier will be changed to rename[media] on copy.
 	#   Blank by default, which results in no renaming.
 	# return: A dictionary that maps asset types to copied files.
-	def copy_media(self, meta_file: Path, dest: Path, rename: dict[str, str] = {}) -> dict[str, Path]:
-		# Get source images list
-		imgs = {}
-		game = ""
-		with open(meta_file, "r") as meta_content:
-			metadata = json.loads(meta_content.read())
-			imgs = metadata["imgs"]
-			game = metadata["clean_name"]
+	def copy_media(self, metadata: dict, dest: Path, rename: dict[str, str] = {}) -> dict[str, Path]:
+		return self.copy_selected_media(metadata["clean_name"], self.select_media(metadata["imgs"]), dest, rename)
 
-		# Get copy destination
-		final_dest: Path = dest.joinpath("media", game)
-		check_path(final_dest)
-
-		# Determine images to copy by region
+	# Chooses the image to export for each asset type, by region preference.
+	# imgs: The "imgs" of a game's metadata.
+	# return: A dictionary that maps asset types to the chosen image.
+	def select_media(self, imgs: dict[str, list[str]]) -> dict[str, Path]:
 		to_copy: dict[str, Path] = {}
-		# Get preferred regions
-		pref_reg = get_preferred_regions(self.base_region)
 		for asset_type in imgs:
 			# Find image for this asset type with highest region priority
-			highest_pref_idx = len(REGIONS)
-			highest_pref_img = -1
-			for i in range(len(imgs[asset_type])):
-				# Get image file as Path object
-				img_path = Path(imgs[asset_type][i])
-				# Get region of this image
-				region = region_from_path(img_path)
-
-				# Check if in preferred region or if it doesn't matter
-				if region in pref_reg:
-					highest_pref_idx = pref_reg.index(region)
-					highest_pref_img = i
-				elif not self.strict_region and highest_pref_idx == len(REGIONS):
-					highest_pref_img = i
-			if highest_pref_img >= 0:
+			ranked = rank_by_region([region_from_path(Path(img)) for img in imgs[asset_type]], self.pref_reg, self.strict_region)
+			if len(ranked) > 0:
 				# Add to images to copy
-				to_copy[asset_type] = Path(imgs[asset_type][highest_pref_img])
+				to_copy[asset_type] = Path(imgs[asset_type][ranked[0]])
+		return to_copy
+
+	# Copies the images chosen by select_media for a game. See copy_media.
+	# Between start_media_copy and finish_media_copy, the copies are only queued.
+	# game: The clean name of the game.
+	# to_copy: The images chosen by select_media.
+	# return: A dictionary that maps asset types to copied files.
+	def copy_selected_media(self, game: str, to_copy: dict[str, Path], dest: Path, rename: dict[str, str] = {}) -> dict[str, Path]:
+		# Get copy destination
+		final_dest: Path = dest.joinpath("media", game)
+		check_path(final_dest)
 
 		# Copy over images
 		for asset_type in to_copy:
@@ -100,11 +154,134 @@ class Exporter():
 
 			file_dest = final_dest.joinpath(new_filename)
 
-			shutil.copy(to_copy[asset_type], file_dest)
+			self.queue_file(to_copy[asset_type], file_dest)
 			to_copy[asset_type] = file_dest
 
 		return to_copy
 
+	# Places a media file with export_file, on the copy pool if it was started.
+	def queue_file(self, src: Path, dest: Path) -> None:
+		if self.copy_pool == None:
+			self.export_file(src, dest)
+			return
+
+		with self.copy_lock:
+			self.copy_total += 1
+		self.copy_pool.submit(self.export_file, src, dest).add_done_callback(self.file_exported)
+
+	# Places a single media file at dest with the exporter's media mode, falling back to a copy.
+	# Files the manifest shows as unchanged are skipped.
+	# The file is placed under a temporary name, then moved over dest: a link left at dest
+	# by a previous export must be replaced, not written through.
+	# return: The number of bytes copied, 0 if the file was skipped or linked.
+	def export_file(self, src: Path, dest: Path) -> int:
+		src_stat = os.stat(src)
+		if self.manifest != None and self.manifest.unchanged(src, src_stat, dest, self.media_mode):
+			return 0
+
+		mode = self.media_mode
+		if mode != "copy" and src_stat.st_dev != os.stat(dest.parent).st_dev:
+			mode = "copy"
+
+		temp_dest = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+		temp_dest.unlink(missing_ok = True)
+		try:
+			match mode:
+				case "hardlink":
+					os.link(src, temp_dest)
+				case "symlink":
+					os.symlink(src.absolute(), temp_dest)
+				case "reflink":
+					reflink_file(src, temp_dest)
+				case _:
+					shutil.copy(src, temp_dest)
+		except OSError:
+			if mode == "copy":
+				raise
+			# Unsupported by this file system
+			mode = "copy"
+			temp_dest.unlink(missing_ok = True)
+			shutil.copy(src, temp_dest)
+		os.replace(temp_dest, dest)
+
+		if self.manifest != None:
+			self.manifest.record(src, src_stat, dest, self.media_mode, mode)
+
+		return src_stat.st_size if mode in ("copy", "reflink") else 0
+
+	# Start placing media on a pool of export_workers threads, so that the exporter can
+	# convert the next games' metadata while their media is copied.
+	def start_media_copy(self) -> None:
+		self.copy_pool = ThreadPoolExecutor(max_workers = self.export_workers, thread_name_prefix = "bsneo-export")
+		self.copy_total = 0
+		self.copy_done = 0
+		self.copy_bytes = 0
+		self.copy_start = time.monotonic()
+		self.copy_last_status = 0.0
+		self.copy_error = None
+
+	# Record a placed media file. Runs on the copy pool.
+	def file_exported(self, future: Future) -> None:
+		with self.copy_lock:
+			self.copy_done += 1
+			if future.exception() != None:
+				if self.copy_error == None:
+					self.copy_error = future.exception()
+			else:
+				self.copy_bytes += future.result()
+
+			now = time.monotonic()
+			if now - self.copy_last_status < EXPORT_STATUS_INTERVAL:
+				return
+			self.copy_last_status = now
+			self.send_copy_status()
+
+	# Send the media copy progress. Must be called with copy_lock held.
+	# The ETA is based on the files queued so far, which grow while games are converted.
+	def send_copy_status(self) -> None:
+		elapsed = time.monotonic() - self.copy_start
+		rate = self.copy_done / elapsed if elapsed > 0 else 0.0
+		eta = (self.copy_total - self.copy_done) / rate if rate > 0 else -1.0
+		self.send_status({
+			"code": "export",
+			"copy_total": self.copy_total,
+			"copy_done": self.copy_done,
+			"copy_bytes": self.copy_bytes,
+			"copy_rate": rate,
+			"copy_eta": eta
+		})
+
+	# Wait for the queued media to be placed and stop the copy pool.
+	# Raises the first error raised while placing a file.
+	def finish_media_copy(self) -> None:
+		if self.copy_pool == None:
+			return
+
+		self.copy_pool.shutdown(wait = True)
+		self.copy_pool = None
+		with self.copy_lock:
+			self.send_copy_status()
+			if self.copy_error != None:
+				raise self.copy_error
+
+	# Start tracking the media placed in an export destination.
+	# dest: The folder holding the exported file and its media/ folder.
+	def open_manifest(self, dest: Path) -> None:
+		if get_option(self.settings, "export_manifest", True):
+			self.manifest = ExportManifest(dest, get_option(self.settings, "export_manifest_hash", False))
+
+	# Delete the media no exported game uses anymore and save the manifest.
+	# keep: Paths, relative to the destination folder, of the media used by the exported file.
+	def close_manifest(self, keep: set[str]) -> None:
+		if self.manifest == None:
+			return
+
+		removed = self.manifest.prune(keep)
+		if removed > 0:
+			self.output(f"Removed {removed} unused media files from the destination.", 0)
+		self.manifest.save()
+		self.manifest = None
+
 	# SKELETON METHOD:
 	# Gets the metadata from an existing file with the exporter class's file format.
 	# existing_file: The existing metadata file.
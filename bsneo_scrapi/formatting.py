@@ -1,6 +1,7 @@
 from pathlib import Path
 from datetime import datetime
 from unidecode import unidecode
+from functools import lru_cache
 import os, re
 
 #
@@ -9,30 +10,55 @@ import os, re
 #
 
 
+# Constants
+# Maximum number of distinct strings remembered by str_to_clean
+CLEAN_CACHE_SIZE = 65536
+
+# Anything in parentheses, brackets or braces
+CLEAN_BRACKETS = re.compile(r"\(.*\)|\[.*\]|\{.*\}")
+
+# Characters removed from clean names
+CLEAN_REMOVE = str.maketrans("", "", ".,!?'\"-")
+
+# Characters replaced in clean names
+CLEAN_REPLACE = str.maketrans({" ": "_", ":": "_", "&": "AND"})
+
 # Converts a string to a clean, comparable format.
+# Results are memoized, so cleaning a string again is a lookup.
 # string: The string to clean up.
 # return: The cleaned up name.
+@lru_cache(maxsize = CLEAN_CACHE_SIZE)
 def str_to_clean(string: str) -> str:
 	# Convert to upper case
 	string = string.upper()
 
 	# Remove anything in parentheses
-	string = re.sub(r"\(.*\)|\[.*\]|\{.*\}", "", string)
+	string = CLEAN_BRACKETS.sub("", string)
 
 	# Normalize text to ASCII
-	string = unidecode(string)
+	if not string.isascii():
+		string = unidecode(string)
 
 	# Strip spaces
 	string = string.strip(" ")
 
-	# Substitute charcters
-	string = re.sub(r"- |\.|,|!|\?|'|\"|-|", "", string)
-	string = re.sub(r"(: )| |:", "_", string)
-	string = re.sub(r"&", "AND", string)
+	# Remove "- " and punctuation
+	string = string.replace("- ", "").translate(CLEAN_REMOVE)
+
+	# Substitute ": ", spaces, colons and "&"
+	string = string.replace(": ", "_").translate(CLEAN_REPLACE)
 
 	return string
 
 
+# Converts a list of strings to clean, comparable format, cleaning each distinct string once.
+# strings: The strings to clean up.
+# return: The cleaned up strings, in the same order.
+def strs_to_clean(strings: list[str]) -> list[str]:
+	cleaned: dict[str, str] = {string: str_to_clean(string) for string in set(strings)}
+	return [cleaned[string] for string in strings]
+
+
 # Converts a Path object to a clean, comparable game name.
 # path: The path to the game file.
 # return: The cleaned up game name.
@@ -0,0 +1,86 @@
+from collections import Counter
+import re
+
+#
+# FuzzyIndex
+# Trigram index for finding the closest clean name to a near-miss title
+#
+
+# Constants
+# Default minimum similarity (Dice coefficient of trigrams) for a fuzzy match
+FUZZY_THRESHOLD = 0.85
+
+# Sequel numbers in clean names, which must agree for two names to match
+SEQUEL_PATTERN = re.compile(r"^(?:\d+|X{0,2}(?:IX|IV|V?I{0,3}))$")
+
+# Leading or trailing article in clean names, e.g. THE_LEGEND_OF_ZELDA or LEGEND_OF_ZELDA_THE
+ARTICLE_PATTERN = re.compile(r"^THE_|_THE$")
+
+# Get the trigrams of a clean name, padded so that short names still have some.
+# Articles are ignored, as titles place them inconsistently.
+def trigrams(name: str) -> set[str]:
+	padded = f"  {ARTICLE_PATTERN.sub('', name)} "
+	return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+# Get the sequel numbers of a clean name, e.g. {"3"} for SUPER_MARIO_BROS_3.
+def sequel_numbers(name: str) -> set[str]:
+	return {token for token in name.split("_") if token != "" and SEQUEL_PATTERN.match(token)}
+
+class FuzzyIndex():
+	# Minimum similarity for a match
+	threshold: float = FUZZY_THRESHOLD
+
+	# names: The clean names to index.
+	def __init__(self, names: list[str], threshold: float = FUZZY_THRESHOLD) -> None:
+		self.threshold = threshold
+
+		# Trigram to names containing it
+		self.grams: dict[str, set[str]] = {}
+		# Name to its trigrams
+		self.name_grams: dict[str, set[str]] = {}
+
+		for name in names:
+			self.add(name)
+
+	# Add a name to the index.
+	def add(self, name: str) -> None:
+		if name in self.name_grams:
+			return
+		self.name_grams[name] = trigrams(name)
+		for gram in self.name_grams[name]:
+			self.grams.setdefault(gram, set()).add(name)
+
+	# Find the indexed name closest to the given clean title.
+	# Names whose sequel numbers differ from the title's are never matched.
+	# candidates: If given, only names in candidates are considered.
+	# return: The closest name with a similarity of at least threshold, or None.
+	def find(self, title: str, candidates = None) -> str:
+		title_grams = trigrams(title)
+
+		# Count shared trigrams of every name sharing at least one
+		shared = Counter()
+		for gram in title_grams:
+			if gram in self.grams:
+				shared.update(self.grams[gram])
+
+		best_name = None
+		best_score = self.threshold
+		title_numbers = None
+		for name, count in shared.most_common():
+			score = 2 * count / (len(title_grams) + len(self.name_grams[name]))
+			if score < best_score:
+				continue
+			if candidates != None and not name in candidates:
+				continue
+
+			if title_numbers == None:
+				title_numbers = sequel_numbers(title)
+			if sequel_numbers(name) != title_numbers:
+				continue
+
+			best_name = name
+			best_score = score
+			if score == 1.0:
+				break
+
+		return best_name
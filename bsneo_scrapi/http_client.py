@@ -0,0 +1,101 @@
+from requests.adapters import HTTPAdapter
+import requests, time
+
+from .throttle import Throttle
+
+#
+# HTTPClient
+# Pooled HTTP session shared by the scrapers and the media downloader
+#
+
+# Constants
+# Default maximum number of open connections to a single host
+HTTP_POOL_SIZE = 8
+
+# Number of hosts for which connections are kept alive
+HTTP_POOL_HOSTS = 10
+
+# Default number of times a failed request is retried
+HTTP_RETRIES = 3
+
+# Default backoff factor between retries in seconds.
+# Retry n waits HTTP_BACKOFF * 2^(n - 1) seconds, unless the server sends Retry-After.
+HTTP_BACKOFF = 0.5
+
+# Response codes for which a request is retried
+HTTP_RETRY_CODES = (429, 500, 502, 503, 504)
+
+class HTTPClient():
+	# Timeout in seconds for page requests
+	page_timeout: float = 15
+
+	# Timeout in seconds for media requests
+	media_timeout: float = 15
+
+	# Keep-alive session holding the connection pools
+	session: requests.Session = None
+
+	# page_timeout: Timeout for get_page, usually Scraper.FETCH_TIMEOUT.
+	# media_timeout: Timeout for get_media, usually MEDIA_NETWORK_TIMEOUT.
+	# pool_size: Maximum number of connections to a single host. Further requests
+	#   to that host wait for a free connection.
+	# retries: Number of retries for connection errors and HTTP_RETRY_CODES responses.
+	# backoff: Backoff factor between retries.
+	def __init__(self, page_timeout: float, media_timeout: float, pool_size: int = HTTP_POOL_SIZE, retries: int = HTTP_RETRIES, backoff: float = HTTP_BACKOFF) -> None:
+		self.page_timeout = page_timeout
+		self.media_timeout = media_timeout
+		self.retries = max(0, retries)
+		self.backoff = backoff
+
+		# Retries are done by get(), so that retried requests go through the caller's throttle
+		adapter = HTTPAdapter(
+			pool_connections = HTTP_POOL_HOSTS,
+			pool_maxsize = max(1, pool_size),
+			pool_block = True,
+			max_retries = 0
+		)
+
+		self.session = requests.Session()
+		self.session.mount("https://", adapter)
+		self.session.mount("http://", adapter)
+
+	# Send a GET request, retrying connection errors and HTTP_RETRY_CODES responses with backoff.
+	# throttle: If given, every attempt, including retries, waits for it first.
+	# return: The response, which may be an HTTP_RETRY_CODES response once the retries run out.
+	#   Raises a requests exception if the request failed.
+	def get(self, link: str, timeout: float, throttle: Throttle = None, **kwargs) -> requests.Response:
+		for attempt in range(self.retries + 1):
+			if throttle != None:
+				throttle.wait()
+
+			try:
+				response = self.session.get(link, timeout = timeout, **kwargs)
+			except (requests.ConnectionError, requests.Timeout):
+				if attempt == self.retries:
+					raise
+				delay = self.backoff * 2 ** attempt
+			else:
+				if not response.status_code in HTTP_RETRY_CODES or attempt == self.retries:
+					return response
+				retry_after = response.headers.get("Retry-After", "")
+				delay = float(retry_after) if retry_after.isdigit() else self.backoff * 2 ** attempt
+				response.close()
+
+			time.sleep(delay)
+
+	# Request a page.
+	# headers: Extra request headers, if any.
+	# throttle: The rate limit of the page's service, if any.
+	# return: The response. Raises a requests exception if the request failed.
+	def get_page(self, link: str, headers: dict = None, throttle: Throttle = None) -> requests.Response:
+		return self.get(link, self.page_timeout, throttle, headers = headers)
+
+	# Request a media file.
+	# stream: If True, the body is not read until the response's content is accessed.
+	# return: The response. Raises a requests exception if the request failed.
+	def get_media(self, link: str, stream: bool = False) -> requests.Response:
+		return self.get(link, self.media_timeout, stream = stream)
+
+	# Close every pooled connection.
+	def close(self) -> None:
+		self.session.close()
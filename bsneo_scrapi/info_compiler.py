@@ -1,11 +1,20 @@
 from typing import Callable
 from yt_dlp import YoutubeDL
 from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
 
-import re, json, requests
+import os, re, hashlib, tempfile, threading
 
 from .paths import *
+from .region import get_preferred_regions, rank_by_region
 from .platform import Platform
+from .http_client import HTTPClient
+from .media_store import MediaStore, move_file
+from .video_queue import VideoQueue
+from .journal import ScrapeJournal
+from .metadata_store import MetadataStore, get_metadata_store
+from .options import get_option
 
 #
 # InfoCompiler
@@ -19,6 +28,25 @@ MEDIA_NETWORK_TIMEOUT = 15
 # Default Video Length Limit in seconds
 VIDEO_LEN_LIMIT = 120
 
+# Size in bytes of the chunks in which images are written to disk
+MEDIA_CHUNK_SIZE = 64 * 1024
+
+# Default number of images downloaded at the same time
+MEDIA_WORKERS = 4
+
+# Number of entries, per media worker, whose images are queued ahead of the entry being finished
+MEDIA_ENTRY_LOOKAHEAD = 2
+
+# Media download policies, as accepted by the "media_policy" setting:
+# "all" downloads every image, "preferred" only the best ranked images of each asset type by region.
+MEDIA_POLICIES = ("all", "preferred")
+
+# Default number of images downloaded per asset type with the "preferred" policy
+MEDIA_POLICY_COUNT = 1
+
+# Niceness added to the video download thread, where the OS supports it
+VIDEO_NICENESS = 10
+
 class InfoCompiler():
 	# The platform for which the games processed in process() belong to
 	platform: Platform = None
@@ -26,23 +54,126 @@ class InfoCompiler():
 	# Whether or not to download videos on this step
 	video_dl: bool = False
 
-	# Checks whether or not the video was actually downloaded
-	video_downloaded: bool = False
-
 	# Output stream function
 	output: Callable[..., None] = None
 
 	# Status update function
 	send_status: Callable[dict, None] = None
 
+	# HTTP client used for media downloads
+	http: HTTPClient = None
+
+	# Optional worker settings, read with options.get_option
+	settings: dict = {}
+
+	# Journal of the scrape run, in which written entries are recorded
+	journal: ScrapeJournal = None
+
 	# Put data into field
-	def __init__(self, platform: Platform, video_dl_now: bool, send_status: Callable[dict, None], output: Callable[..., None]) -> None:
+	# http: The worker's shared HTTP client. If None, the compiler creates its own.
+	# journal: The platform's scrape journal. Optional.
+	def __init__(self, platform: Platform, video_dl_now: bool, send_status: Callable[dict, None], output: Callable[..., None], settings: dict = {}, http: HTTPClient = None, journal: ScrapeJournal = None) -> None:
 		self.platform = platform
 		self.video_dl = video_dl_now
+		self.settings = settings
+		self.journal = journal
+
+		# Store which entries are written to
+		self.meta_store: MetadataStore = get_metadata_store(self.platform.pid)
+
+		self.http = http
+		if self.http == None:
+			self.http = HTTPClient(MEDIA_NETWORK_TIMEOUT, MEDIA_NETWORK_TIMEOUT)
+
+		# Number of images downloaded at the same time
+		self.media_workers: int = max(1, get_option(self.settings, "media_workers", MEDIA_WORKERS))
+
+		# Image download pool, created by process()
+		self.media_pool: ThreadPoolExecutor = None
+
+		# Content-addressed store holding the downloaded images, unless the media_store setting is False
+		self.store: MediaStore = None
+		if get_option(self.settings, "media_store", True):
+			self.store = MediaStore()
+
+		# Whether process() marked the store as used, until close_store
+		self.store_in_use: bool = False
+
+		# Media download policy, and the region preferences it ranks images with
+		self.media_policy: str = get_option(self.settings, "media_policy", "all")
+		self.media_policy_count: int = max(1, get_option(self.settings, "media_policy_count", MEDIA_POLICY_COUNT))
+		self.pref_reg: list[str] = get_preferred_regions(get_option(self.settings, "region", "none"))
+		self.strict_region: bool = get_option(self.settings, "strict_region", False)
+
+		# If True, images skipped by the media policy are downloaded by a background pass after process()
+		self.media_deferred: bool = get_option(self.settings, "media_deferred", False)
+		self.deferred_media: list[tuple[str, dict[str, list]]] = []
+		self.deferred_thread: threading.Thread = None
+
+		# Videos are downloaded from a persistent queue by the video thread, started by process()
+		self.video_queue: VideoQueue = None
+		self.video_thread: threading.Thread = None
+
+		# Set to stop the background threads
+		self.background_stop = threading.Event()
+
+		# Number of background threads still running, and the status to send once none is,
+		# guarded by status_lock. See finish_when_idle.
+		self.background_running: int = 0
+		self.final_status: dict = None
+		self.cancelled: bool = False
+
+		# Number of entries handed to process() so far, and whether it was known up front
+		self.received_count: int = 0
+		self.entries_sized: bool = True
+
+		# True while entries are streamed from a scrape that is still running. The scraper then
+		# owns the status code, and media progress is only sent in its own fields.
+		self.streaming: bool = False
+
+		# Status counters shared by the download threads, guarded by status_lock
+		self.status_lock = threading.Lock()
+		self.media_total: int = 0
+		self.media_progress: int = 0
+		self.processed_count: int = 0
 
 		self.send_status = send_status
 		self.output = output
 
+	# Sends a status update. Safe to call from the download threads.
+	def update_status(self, status: dict) -> None:
+		with self.status_lock:
+			self.send_status(status)
+
+	# Gets the path an image is downloaded to.
+	# The parameters are the same as download_image's.
+	def get_image_path(self, link: str, asset_type: str, region: str, game_name: str) -> Path:
+		# Extract file extension from link
+		file_ext: str = re.search(r"(\.[^.]+)$", link).group(0).lower()
+
+		return PATH_MEDIA(self.platform.pid).joinpath(game_name, asset_type + "_" + region + file_ext)
+
+	# Gets the directory for an image's temporary download file.
+	def get_image_temp_dir(self, image_path: Path) -> Path:
+		if self.store != None:
+			return self.store.temp_dir()
+		return image_path.parent
+
+	# Moves a fully downloaded image into place, through the media store if it is used.
+	# temp_name: The temporary download file, in get_image_temp_dir(image_path).
+	# digest: The SHA-256 hex digest of the image.
+	def place_image(self, temp_name: str, digest: str, link: str, image_path: Path) -> None:
+		if self.store == None:
+			os.replace(temp_name, image_path)
+		elif not self.store.linkable:
+			# Links are not supported here, so the image is only kept as a plain file
+			move_file(temp_name, image_path)
+		else:
+			blob = self.store.add(temp_name, digest, link)
+			if not self.store.link(blob, image_path):
+				self.output("Media Store Links Are Not Supported Here, Keeping Plain Images Instead.", 1)
+				self.store.release(blob, image_path)
+
 	# Directly downloads an image from the given link
 	# link: The URL which links to the image to be downloaded.
 	# asset_type: The asset type of the image, which becomes part of its filename.
@@ -50,33 +181,51 @@ class InfoCompiler():
 	# game_name: The clean name of the game entry which has this image.
 	# returns a Path object to the downloaded image if successful, None otherwise.
 	def download_image(self, link: str, asset_type: str, region: str, game_name: str) -> Path:
-		# Store Raw Image Data
-		image_data = None
-
-		# Extract file extension from link
-		file_ext: str = re.search(r"(\.[^.]+)$", link).group(0).lower()
-
 		# Get image file path
-		image_path: Path = PATH_MEDIA(self.platform.pid).joinpath(game_name, asset_type + "_" + region + file_ext)
+		image_path: Path = self.get_image_path(link, asset_type, region, game_name)
+		file_ext: str = image_path.suffix
 
 		# Check if image already exists
 		if not image_path.exists():
-			# Attempt to Download the image
+			# Link the image if the media store already holds it, e.g. from an aliased platform
+			if self.store != None and self.store.link_url(link, image_path):
+				self.output(f"Image {asset_type}_{region}{file_ext} Found in Media Store", 0)
+				return image_path
+
+			# Attempt to Download the image, streaming it to a temporary file
+			# which is only moved once complete, so a failed download never leaves a partial image.
+			temp_fd = None
+			temp_name = None
 			try:
+				temp_fd, temp_name = tempfile.mkstemp(prefix = image_path.name + ".", suffix = ".part", dir = self.get_image_temp_dir(image_path))
 				self.output(f"Downloading Image from URL: {link}", -1)
-				image_data = requests.get(link, timeout = MEDIA_NETWORK_TIMEOUT)
+				with self.http.get_media(link, stream = True) as image_data:
+					if image_data.status_code != 200:
+						raise IOError(f"Server returned code {image_data.status_code}")
+
+					# Write to MEDIA_PATH/{NAME}
+					self.output(f"Writing Image to File ({asset_type}_{region}{file_ext})", -1)
+					written = 0
+					digest = hashlib.sha256()
+					with os.fdopen(temp_fd, "wb") as image_file:
+						temp_fd = None
+						for chunk in image_data.iter_content(MEDIA_CHUNK_SIZE):
+							image_file.write(chunk)
+							digest.update(chunk)
+							written += len(chunk)
+
+					# Check that the whole image arrived (only possible if the body is not re-encoded)
+					expected = image_data.headers.get("Content-Length")
+					if expected != None and image_data.headers.get("Content-Encoding", "identity") == "identity" and int(expected) != written:
+						raise IOError(f"Expected {expected} bytes, received {written}")
+
+				self.place_image(temp_name, digest.hexdigest(), link, image_path)
 			except Exception as e:
 				self.output(f"Image Download Failed: {e}", 1)
-				return None
-
-			# Write Image to File
-			try:
-				self.output(f"Writing Image to File ({asset_type}_{region}{file_ext})", -1)
-				# Write to MEDIA_PATH/{NAME}
-				with open(image_path, "wb") as image_file:
-					image_file.write(image_data.content)
-			except Exception as e:
-				self.output(f"Image Write Failed: {e}", 1)
+				if temp_fd != None:
+					os.close(temp_fd)
+				if temp_name != None:
+					Path(temp_name).unlink(missing_ok = True)
 				return None
 
 			# Indicate Success
@@ -91,7 +240,7 @@ class InfoCompiler():
 	def video_len_test(self, info):
 		duration = info.get("duration")
 		if duration and duration > VIDEO_LEN_LIMIT:
-			self.send_status({"video_progress": -2})
+			self.update_status({"video_progress": -2})
 			return "Video is too long"
 
 	# Hooks to the currently downloading video to output.
@@ -102,23 +251,22 @@ class InfoCompiler():
 
 			# Get total video size (if possible)
 			total = None
-			if ("total_bytes" in d):
+			if ("total_bytes" in dl):
 				total = dl["total_bytes"]
-			elif ("total_bytes_estimate" in d):
+			elif ("total_bytes_estimate" in dl):
 				total = dl["total_bytes_estimate"]
 
 			if not(total == None):
 				# Output Video Download Progress
 				self.output(f"Downloading Video: {(downloaded / total) * 100}%", -1)
-				self.send_status({"code": "video", "video_progress": (downloaded / total)})
+				self.update_status({"video_progress": (downloaded / total)})
 			else:
 				# Send Indeterminate Video Download Progress
-				self.send_status({"code": "video", "video_progress": -1})
+				self.update_status({"video_progress": -1})
 		if dl["status"] == "finished":
 			# Output that the video has finished downloading
 			self.output("Video download has finished.", 0)
-			self.send_status({"code": "video", "video_progress": 1.0})
-			self.video_downloaded = True
+			self.update_status({"video_progress": 1.0})
 
 
 	# Downloads the video from the given link. The link may be a direct video link or
@@ -130,90 +278,343 @@ class InfoCompiler():
 		# Define place to download video
 		video_path = PATH_MEDIA(self.platform.pid).joinpath(game_name, "video.mp4")
 
+		# Set by this download's own hook, so that concurrent downloads never read each other's result
+		finished: list[bool] = []
+		def finished_hook(dl):
+			if dl["status"] == "finished":
+				finished.append(True)
+
 		# Define filter for capping video length, progress hook
 		# for capturing download progress, and output file.
+		# Partial downloads are kept and continued if the download is interrupted.
 		dl_options = {
 			"match_filter": self.video_len_test,
 			"outtmpl": str(video_path),
-			"progress_hooks": [self.video_progress_hook]
+			"progress_hooks": [self.video_progress_hook, finished_hook],
+			"continuedl": True,
+			"nopart": False
 		}
 
 		# Download Video via yt-dlp
-		self.send_status({"code": "video", "video_progress": 0.0})
+		self.update_status({"video_progress": 0.0})
 		with YoutubeDL(dl_options) as video_downloader:
 			err = video_downloader.download(link)
-			if err == 0:
+			if err == 0 and len(finished) > 0:
 				return video_path
 
 		return None
 
+	# Apply the media policy to an entry before its images are downloaded.
+	# With the "preferred" policy, entry["imgs"] only keeps the media_policy_count images of each
+	# asset type which an exporter would choose first. The other images are queued for the
+	# deferred pass if media_deferred is set.
+	# return: The images left out, in the same format as entry["imgs"].
+	def apply_media_policy(self, entry: dict) -> dict[str, list]:
+		left_out: dict[str, list] = {}
+		if self.media_policy != "preferred":
+			return left_out
+
+		for asset_type in entry["imgs"]:
+			images = entry["imgs"][asset_type]
+			ranked = rank_by_region([image_region for image_url, image_region in images], self.pref_reg, self.strict_region)
+			kept = ranked[:self.media_policy_count]
+
+			entry["imgs"][asset_type] = [images[i] for i in kept]
+			rest = [images[i] for i in ranked[self.media_policy_count:]] + [images[i] for i in range(len(images)) if not i in ranked]
+			if len(rest) > 0:
+				left_out[asset_type] = rest
+
+		if self.media_deferred and len(left_out) > 0:
+			self.deferred_media.append((entry["clean_name"], left_out))
+
+		return left_out
+
+	# Queue the downloads of every image of an entry on the media pool.
+	# return: A dict mapping each asset type to the futures of its images, in order.
+	def queue_images(self, entry: dict) -> dict[str, list[Future]]:
+		self.apply_media_policy(entry)
+		self.output(f"Downloading Images for {entry['clean_name']}...", 0)
+		check_path(PATH_MEDIA(self.platform.pid).joinpath(entry["clean_name"]))
+
+		image_futures: dict[str, list[Future]] = {}
+		image_count = 0
+		for asset_type in entry["imgs"]:
+			image_futures[asset_type] = []
+			for image_url, image_region in entry["imgs"][asset_type]:
+				image_futures[asset_type].append(self.media_pool.submit(self.download_queued_image, image_url, asset_type, image_region, entry["clean_name"]))
+				image_count += 1
+
+		# Get Number of Images To Download & Send as status
+		with self.status_lock:
+			self.media_total += image_count
+			self.send_status({"media_total": self.media_total, "media_progress": self.media_progress})
+
+		return image_futures
+
+	# Download an image queued by queue_images and report progress. Runs on the media pool.
+	# return: The same as download_image.
+	def download_queued_image(self, link: str, asset_type: str, region: str, game_name: str) -> Path:
+		# Update Status
+		self.update_status({"media_current": asset_type, "media_region": region})
+
+		image_path = self.download_image(link, asset_type, region, game_name)
+		if image_path != None:
+			# Update Progress
+			with self.status_lock:
+				self.media_progress += 1
+				self.send_status({"media_progress": self.media_progress})
+
+		return image_path
+
+	# Wait for the images of an entry, then convert urls + regions to filepaths in entry["imgs"].
+	# If an image could not be downloaded, discard the image entry.
+	# image_futures: The futures returned by queue_images for this entry.
+	def collect_images(self, entry: dict, image_futures: dict[str, list[Future]]) -> None:
+		for asset_type in image_futures:
+			image_paths = [image_future.result() for image_future in image_futures[asset_type]]
+			entry["imgs"][asset_type] = [str(image_path) for image_path in image_paths if image_path != None]
+
+	# Write an entry to the platform's metadata store.
+	def write_entry(self, entry: dict) -> None:
+		self.output(f"Writing {entry['clean_name']} to the metadata store...", 0)
+		self.meta_store.put(entry)
+
+	# Read an entry from the platform's metadata store.
+	# return: The entry, or None if it was never written.
+	def read_entry(self, clean_name: str) -> dict:
+		return self.meta_store.get(clean_name)
+
+	# Update an entry which was already written.
+	# update: Function changing the entry in place.
+	# return: True if the entry was updated, False if it was never written.
+	def patch_entry(self, clean_name: str, update: Callable[dict, None]) -> bool:
+		return self.meta_store.update(clean_name, update)
+
+	# Finish an entry once its images are downloaded: download its video and write its metadata.
+	# image_futures: The futures returned by queue_images for this entry.
+	# scraped_with: The scraper service used for this entry.
+	def finish_entry(self, entry: dict, image_futures: dict[str, list[Future]], scraped_with: str) -> None:
+		self.collect_images(entry, image_futures)
+		self.complete_entry(entry, scraped_with)
+
+	# Complete an entry whose "imgs" hold file paths: write its metadata and queue its video.
+	# The video path is added to the metadata once the video thread has downloaded it.
+	# scraped_with: The scraper service used for this entry.
+	def complete_entry(self, entry: dict, scraped_with: str) -> None:
+		entry["scraped_with"] = scraped_with
+
+		# Convert entry to JSON and write to file
+		self.write_entry(entry)
+		if self.journal != None:
+			self.journal.record_done(entry["clean_name"])
+
+		# Queue Video (if not specified to delay video downloads until later)
+		self.output(f"Checking for video download...", 0)
+		if self.video_queue != None and "video" in entry:
+			self.video_queue.push(entry["clean_name"], entry["video"])
+
+		# Update Progress
+		with self.status_lock:
+			self.processed_count += 1
+			status = {"processed_count": self.processed_count}
+			if not self.streaming:
+				status["code"] = "image"
+			self.send_status(status)
+
+	# Download the images left out by the media policy, and add them to the metadata files.
+	# Runs on the deferred thread started by start_deferred.
+	def download_deferred(self) -> None:
+		self.output(f"Downloading {len(self.deferred_media)} Entries of Deferred Media...", 0)
+		with ThreadPoolExecutor(max_workers = self.media_workers) as pool:
+			for clean_name, left_out in self.deferred_media:
+				if self.background_stop.is_set():
+					break
+
+				image_futures: dict[str, list[Future]] = {}
+				for asset_type in left_out:
+					image_futures[asset_type] = [pool.submit(self.download_image, image_url, asset_type, image_region, clean_name) for image_url, image_region in left_out[asset_type]]
+
+				# Add the downloaded images after the ones the exporter prefers
+				image_paths: dict[str, list[str]] = {}
+				for asset_type in image_futures:
+					downloaded = [image_future.result() for image_future in image_futures[asset_type]]
+					image_paths[asset_type] = [str(image_path) for image_path in downloaded if image_path != None]
+
+				def add_images(entry: dict) -> None:
+					for asset_type in image_paths:
+						known_paths = entry["imgs"].setdefault(asset_type, [])
+						known_paths += [image_path for image_path in image_paths[asset_type] if not image_path in known_paths]
+				self.patch_entry(clean_name, add_images)
+
+		self.deferred_media = []
+		self.close_store()
+		self.output("Deferred Media Download Finished.", 0)
+
+	# Close the media store's index once no download needs it anymore.
+	def close_store(self) -> None:
+		if self.store != None:
+			self.store.close()
+			if self.store_in_use:
+				self.store_in_use = False
+				self.store.release_use()
+
+	# Start the deferred media pass in the background, if there is anything to download.
+	def start_deferred(self) -> None:
+		if self.media_deferred and len(self.deferred_media) > 0:
+			self.deferred_thread = self.background_thread(self.download_deferred, "bsneo-deferred-media")
+			self.deferred_thread.start()
+		else:
+			self.close_store()
+
+	# Download the videos of the video queue, and add their paths to the metadata files.
+	# Runs on the video thread started by start_video_thread, until the queue is closed and empty.
+	# Videos still queued when the thread is stopped are downloaded on the next run.
+	def download_queued_videos(self) -> None:
+		# Lower this thread's priority so videos do not slow down the rest of the pipeline
+		try:
+			os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), VIDEO_NICENESS)
+		except (AttributeError, OSError):
+			pass
+
+		while not self.background_stop.is_set():
+			video = self.video_queue.next()
+			if video == None:
+				break
+
+			self.output(f"Downloading Video for {video['clean_name']}...", 0)
+			try:
+				video_path: Path = self.download_video(video["link"], video["clean_name"])
+			except Exception as e:
+				self.output(f"Video Download Failed: {e}", 1)
+				video_path = None
+
+			if video_path != None:
+				self.patch_entry(video["clean_name"], lambda entry: entry.update({"video": str(video_path)}))
+			self.video_queue.done(video["clean_name"])
+
+		self.output("Video Queue Finished.", 0)
+
+	# Start the video thread if videos are downloaded now, resuming the videos queued by earlier runs.
+	def start_video_thread(self) -> None:
+		if not self.video_dl:
+			return
+
+		self.background_stop.clear()
+		self.video_queue = VideoQueue(self.platform.pid)
+		if len(self.video_queue) > 0:
+			self.output(f"Resuming {len(self.video_queue)} Queued Videos...", 0)
+		self.video_thread = self.background_thread(self.download_queued_videos, "bsneo-video-queue")
+		self.video_thread.start()
+
+	# Create a background thread running task, counted in background_running until it ends.
+	def background_thread(self, task: Callable[[], None], name: str) -> threading.Thread:
+		def run_task() -> None:
+			try:
+				task()
+			finally:
+				with self.status_lock:
+					self.background_running -= 1
+					if self.background_running == 0 and self.final_status != None:
+						self.send_status(self.final_status)
+						self.final_status = None
+
+		with self.status_lock:
+			self.background_running += 1
+		return threading.Thread(target = run_task, name = name, daemon = True)
+
+	# Send a status once the background threads have finished, or now if none is running.
+	# Used for the final status of a run, so that it is not followed by background progress.
+	def finish_when_idle(self, status: dict) -> None:
+		with self.status_lock:
+			if self.background_running == 0:
+				self.send_status(status)
+			else:
+				self.final_status = status
+
+	# Start the background passes once every entry was processed.
+	# The video thread finishes the queued videos, and the deferred media pass starts.
+	def start_background(self) -> None:
+		if self.video_queue != None:
+			self.video_queue.close()
+		self.start_deferred()
+
+	# Reset the counters of process() and send the initial status.
+	# entries: The entries to process. May be an iterable without a length, such as an EntryStream.
+	def start_entries(self, entries) -> None:
+		self.processed_count = 0
+		self.media_total = 0
+		self.media_progress = 0
+		self.received_count = 0
+		self.entries_sized = hasattr(entries, "__len__")
+		self.streaming = not self.entries_sized
+		self.deferred_media = []
+		if self.store != None and not self.store_in_use:
+			self.store_in_use = True
+			self.store.acquire_use()
+		self.output("Starting to Download Any Media...", 0)
+
+		status = {"to_process_total": len(entries) if self.entries_sized else 0, "processed_count": 0}
+		if not self.streaming:
+			status["code"] = "image"
+		self.update_status(status)
+
+	# Mark the end of the entries handed to process(). Once a streamed scrape has ended,
+	# the status code shows the remaining media downloads.
+	def end_entries(self) -> None:
+		with self.status_lock:
+			if self.streaming:
+				self.streaming = False
+				self.send_status({"code": "image"})
+
+	# Count an entry handed to process(). If the number of entries was not known up front,
+	# the total number of entries to process grows with each entry.
+	def receive_entry(self) -> None:
+		self.received_count += 1
+		if not self.entries_sized:
+			self.update_status({"to_process_total": self.received_count})
+
+	# Stop a running process() call, and the background downloads, as soon as possible.
+	# Entries already written are kept.
+	def cancel(self) -> None:
+		self.cancelled = True
+		self.background_stop.set()
+		if self.video_queue != None:
+			self.video_queue.close()
+
 	# Processes all "entries" entries in the given metadata dict, and downloads images.
+	# Images are downloaded by media_workers threads. While an entry is finished, the
+	# images of the next entries keep downloading.
 	# metadata: The textual data acquired from the scraper script.
 	#   requires at least one field named "entries", which holds a list
-	#   of metadata from each item scraped.
+	#   of metadata from each item scraped. It may also be an EntryStream,
+	#   in which case entries are processed as they are scraped.
 	def process(self, metadata: dict) -> None:
-		processed_count = 0
-		self.output("Starting to Download Any Media...", 0)
-		self.send_status({"code": "image", "to_process_total": len(metadata["entries"]), "processed_count": 0})
-		for entry in metadata["entries"]:
-			# Download images and convert urls + regions to filepaths in entry["imgs"].
-			# If an image cannot be downloaded, discard the image entry.
-			self.output(f"Downloading Images for {entry['clean_name']}...", 0)
-			check_path(PATH_MEDIA(self.platform.pid).joinpath(entry["clean_name"]))
-
-			# Get Number of Images To Download & Send as status
-			media_total = 0
-			for atype in entry["imgs"]:
-				media_total += len(entry["imgs"][atype])
-			self.send_status({"media_total": media_total, "media_progress": 0})
-
-			# Download Images
-			media_progress = 0
-			for asset_type in entry["imgs"]:
-				for i in range(len(entry["imgs"][asset_type])):
-					# Get URL and region
-					image_url = entry["imgs"][asset_type][i][0]
-					image_region = entry["imgs"][asset_type][i][1]
-
-					# Update Status
-					self.send_status({"media_current": asset_type, "media_region": image_region})
-
-					image_path = self.download_image(image_url, asset_type, image_region, entry["clean_name"])
-					if image_path != None:
-						entry["imgs"][asset_type][i] = str(image_path)
-
-						# Update Progress
-						media_progress += 1
-						self.send_status({"media_progress": media_progress})
-					else:
-						del entry["imgs"][asset_type][i]
-						i -= 1
-
-			self.send_status({"media_current": "none"})
-
-			entry["scraped_with"] = metadata["scraped_with"]
-
-			# Download Video (if not specified to delay video downloads until later)
-			self.output(f"Checking for video download...", 0)
-			if self.video_dl and "video" in entry:
-				video_path: Path = self.download_video(entry["video"], entry["clean_name"])
-				if self.video_downloaded:
-					entry["video"] = str(video_path)
-
-			# Convert entry to JSON and write to file
-			self.output(f"Writing {entry['clean_name']} to file...", 0)
-			entry_json: str = json.dumps(entry)
-			check_path(PATH_META(self.platform.pid))
-			with open(PATH_META(self.platform.pid).joinpath(entry["clean_name"] + ".json"), "w") as meta_file:
-				meta_file.write(entry_json)
-
-			# Update Progress
-			processed_count += 1
-			self.send_status({"code": "image", "processed_count": processed_count})
-
-
-
-
-
-
-
+		self.start_entries(metadata["entries"])
+		self.start_video_thread()
+
+		# Entries whose images are queued, in order
+		queued: deque[tuple[dict, dict[str, list[Future]]]] = deque()
+		lookahead = self.media_workers * MEDIA_ENTRY_LOOKAHEAD
+
+		self.media_pool = ThreadPoolExecutor(max_workers = self.media_workers)
+		try:
+			for entry in metadata["entries"]:
+				if self.cancelled:
+					break
+				self.receive_entry()
+				queued.append((entry, self.queue_images(entry)))
+
+				# Finish the oldest entry once enough entries are queued behind it
+				if len(queued) > lookahead:
+					self.finish_entry(*queued.popleft(), metadata["scraped_with"])
+			self.end_entries()
+
+			while len(queued) > 0 and not self.cancelled:
+				self.finish_entry(*queued.popleft(), metadata["scraped_with"])
+		finally:
+			self.media_pool.shutdown(wait = True, cancel_futures = True)
+			if self.video_queue != None:
+				self.video_queue.close()
+
+		self.update_status({"media_current": "none"})
+		self.start_background()
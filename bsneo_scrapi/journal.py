@@ -0,0 +1,119 @@
+from pathlib import Path
+import json, hashlib, threading
+
+from .paths import *
+
+#
+# ScrapeJournal
+# Append-only per-platform log of a scrape run, so a run which was interrupted can resume.
+# Each line is a JSON record:
+#   {"match": clean name, "link": data page}: A game was matched to its page.
+#   {"entry": entry}: A game's metadata was scraped, with image URLs still remote.
+#   {"page": n, "run": key}: Every game on search page n was matched, in a run over the games of run_key key.
+#   {"done": clean name}: A game's metadata file was written.
+# The journal is cleared once a run finishes.
+#
+
+# Get a key identifying the set of games a run searches for, so that its search pages
+# are only skipped by a run over the same games.
+# games: The clean names of the games.
+def run_key(games) -> str:
+	return hashlib.sha1("\n".join(sorted(games)).encode("utf-8")).hexdigest()
+
+class ScrapeJournal():
+	def __init__(self, pid: str) -> None:
+		self.path: Path = PATH_SYS(pid).joinpath("scrape_journal.jsonl")
+		self.lock = threading.Lock()
+		self.journal_file = None
+
+		# State of the interrupted run, read from the journal
+		self.matches: dict[str, str] = {}
+		self.entries: dict[str, dict] = {}
+		self.done: set[str] = set()
+		# Last search page searched, for each run_key
+		self.pages: dict[str, int] = {}
+		self.load()
+
+	# Read the journal left by an interrupted run, if any.
+	# A line cut off by the interruption is ignored.
+	def load(self) -> None:
+		if not self.path.exists():
+			return
+
+		with open(self.path, "r") as journal_file:
+			for line in journal_file:
+				try:
+					record = json.loads(line)
+				except ValueError:
+					continue
+
+				if "match" in record:
+					self.matches[record["match"]] = record["link"]
+				elif "entry" in record:
+					self.entries[record["entry"]["clean_name"]] = record["entry"]
+				elif "page" in record:
+					run = record.get("run", "")
+					self.pages[run] = max(self.pages.get(run, 0), record["page"])
+				elif "done" in record:
+					self.done.add(record["done"])
+
+	# Check whether an interrupted run left anything to resume.
+	def resumable(self) -> bool:
+		return len(self.pages) > 0 or len(self.matches) > 0
+
+	# Get the last search page searched by an interrupted run over the same games.
+	# run: The run_key of the games being searched for.
+	# return: The page number, or 0 if no such run searched any page.
+	def searched_page(self, run: str) -> int:
+		return self.pages.get(run, 0)
+
+	# Get the entries which were scraped but never written.
+	# games: If given, only entries of these clean names are returned.
+	def pending_entries(self, games: dict = None) -> list[dict]:
+		return [
+			entry for game, entry in self.entries.items()
+			if not game in self.done and (games == None or game in games)
+		]
+
+	# Get the matched games which were never scraped, mapped to their data pages.
+	def pending_matches(self) -> dict[str, str]:
+		return {game: link for game, link in self.matches.items() if not game in self.entries and not game in self.done}
+
+	# Append a record, flushing it so that it survives the app being killed.
+	def record(self, record: dict) -> None:
+		line = json.dumps(record) + "\n"
+		with self.lock:
+			if self.journal_file == None:
+				check_path(self.path.parent)
+				self.journal_file = open(self.path, "a")
+			self.journal_file.write(line)
+			self.journal_file.flush()
+
+	def record_match(self, game: str, data_page: str) -> None:
+		self.record({"match": game, "link": data_page})
+
+	def record_entry(self, entry: dict) -> None:
+		self.record({"entry": entry})
+
+	def record_page(self, page: int, run: str) -> None:
+		self.record({"page": page, "run": run})
+
+	def record_done(self, game: str) -> None:
+		self.record({"done": game})
+
+	# Close the journal file. It is opened again by the next record.
+	def close(self) -> None:
+		with self.lock:
+			if self.journal_file != None:
+				self.journal_file.close()
+				self.journal_file = None
+
+	# Remove the journal once the run it records has finished.
+	def clear(self) -> None:
+		self.close()
+		with self.lock:
+			self.path.unlink(missing_ok = True)
+			self.matches = {}
+			self.entries = {}
+			self.done = set()
+			self.pages = {}
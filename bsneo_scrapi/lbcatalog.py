@@ -0,0 +1,94 @@
+from pathlib import Path
+import os, json, time
+
+from .paths import *
+from .formatting import str_to_clean
+
+#
+# LBCatalog
+# Local index of a platform's LaunchBox search pages, mapping clean titles to detail page URLs
+#
+
+# Constants
+# Seconds after a complete crawl before missing games trigger a new crawl from the first page
+LB_CATALOG_REFRESH = 24 * 60 * 60
+
+class LBCatalog():
+	# Path to the catalog file
+	path: Path = None
+
+	# Load the catalog of the given platform, or start a blank one.
+	def __init__(self, pid: str) -> None:
+		self.path = PATH_SYS(pid).joinpath("lb_catalog.json")
+
+		# Clean titles to detail page URLs
+		self.titles: dict[str, str] = {}
+		# Last search page which has been added
+		self.pages: int = 0
+		# Whether the last search page has been added
+		self.complete: bool = False
+		# Time at which the catalog was last completed
+		self.updated: float = 0.0
+
+		if self.path.exists():
+			try:
+				with open(self.path, "r") as catalog_file:
+					catalog = json.loads(catalog_file.read())
+					self.titles = catalog["titles"]
+					self.pages = catalog["pages"]
+					self.complete = catalog["complete"]
+					self.updated = catalog["updated"]
+			except (ValueError, KeyError):
+				# Start over from a blank catalog
+				pass
+
+	# Get the detail page URL for a clean title.
+	# return: The URL, or None if the title is not in the catalog.
+	def lookup(self, clean_title: str) -> str:
+		return self.titles.get(clean_title)
+
+	# Remove a title whose detail page could not be scraped, so that a later crawl can replace it.
+	def forget(self, clean_title: str) -> None:
+		if clean_title in self.titles:
+			del self.titles[clean_title]
+
+	# Get the search page to continue crawling from.
+	# return: The next page that has not been added yet, page 1 if the catalog is complete but
+	#   out of date, or None if the catalog is complete and up to date.
+	def resume_page(self) -> int:
+		if not self.complete:
+			return self.pages + 1
+		if time.time() - self.updated > LB_CATALOG_REFRESH:
+			# Refresh catalog from the start
+			self.pages = 0
+			self.complete = False
+			return 1
+		return None
+
+	# Add the cards of a crawled search page.
+	# cards: A list of (title, link) pairs, as returned by LBScraper.parse_search_page.
+	# last_page: Whether this is the last search page.
+	def add_page(self, page: int, cards: list[tuple[str, str]], last_page: bool) -> None:
+		for title, details_link in cards:
+			# The first card with a given title wins, as in a search
+			clean_title = str_to_clean(title)
+			if not clean_title in self.titles:
+				self.titles[clean_title] = f"https://gamesdb.launchbox-app.com{details_link}"
+
+		self.pages = max(self.pages, page)
+		if last_page:
+			self.complete = True
+			self.updated = time.time()
+
+	# Write the catalog to its file, replacing it at once so an interruption never leaves it cut off.
+	def save(self) -> None:
+		check_path(self.path.parent)
+		temp_path = self.path.with_name(self.path.name + ".tmp")
+		with open(temp_path, "w") as catalog_file:
+			catalog_file.write(json.dumps({
+				"titles": self.titles,
+				"pages": self.pages,
+				"complete": self.complete,
+				"updated": self.updated,
+			}))
+		os.replace(temp_path, self.path)
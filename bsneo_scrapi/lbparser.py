@@ -0,0 +1,178 @@
+from bs4 import BeautifulSoup
+import re
+
+# lxml is optional, as it is not available on every platform bsneo is built for.
+try:
+	import lxml.html
+except ImportError:
+	lxml = None
+
+#
+# LBParser
+# HTML extraction backends for LaunchBox pages.
+# Each backend parses a page into a tree, then extracts raw values from the tree.
+# Missing values are returned as None.
+#
+
+# Constants
+# Headings of the detail cards holding list type fields
+LB_LIST_FIELDS = ("Genres", "Developers", "Publishers")
+
+# BeautifulSoup backend. Slow, but only depends on the standard library's html.parser.
+class BS4Parser():
+	name: str = "bs4"
+
+	# Parse page contents into a tree.
+	# return: The tree. Raises an exception if the page could not be parsed.
+	def parse(self, content: str):
+		return BeautifulSoup(content, "html.parser")
+
+	# Check whether a search page is the last page.
+	def is_last_page(self, tree) -> bool:
+		return tree.find("span", class_="current next") != None
+
+	# Get the game cards on a search page.
+	# return: A list of (title, link) pairs.
+	def search_cards(self, tree) -> list[tuple[str, str]]:
+		card_list = tree.find_all("div", class_=re.compile("games-grid-card"))
+		return [(card.find("div", class_="cardTitle").h3.text, card.find("a")["href"]) for card in card_list]
+
+	# Get the raw text metadata on a details page.
+	# return: A dict with the keys "name", "rating", "release", "desc" and "video" holding
+	#   strings, and the lowercase LB_LIST_FIELDS holding lists of strings.
+	#   Line endings in "desc" are normalized to "\n".
+	def metadata_fields(self, tree) -> dict:
+		fields = {}
+
+		try:
+			fields["name"] = tree.find("section", class_="heroSection").find("h1").text
+		except AttributeError:
+			fields["name"] = None
+
+		try:
+			fields["rating"] = tree.find("span", id="yourRatingShort").text
+		except AttributeError:
+			fields["rating"] = None
+
+		try:
+			fields["release"] = tree \
+				.find("div", class_=re.compile("infoCards")) \
+				.find("div", class_="cardHeading") \
+				.find("span", string="Release Date") \
+				.parent.parent.h6.text
+		except AttributeError:
+			fields["release"] = None
+
+		for field in LB_LIST_FIELDS:
+			try:
+				fields[field.lower()] = [tag.text for tag in tree.find("h5", string=field).parent.find_all("a")]
+			except AttributeError:
+				fields[field.lower()] = None
+
+		for key, heading, tag in (("desc", "Overview", "p"), ("video", "Video", "a")):
+			try:
+				fields[key] = tree.find("h5", string=heading).parent.find(tag).text
+			except AttributeError:
+				fields[key] = None
+
+		if fields["desc"] != None:
+			fields["desc"] = fields["desc"].replace("\r\n", "\n")
+
+		return fields
+
+	# Get the images on an images page.
+	# return: A list of (url, title) pairs, or None if the page has no image list.
+	def image_links(self, tree) -> list[tuple[str, str]]:
+		image_list = tree.find("div", class_=re.compile("image-list"))
+		if image_list == None:
+			return None
+		return [(tag["href"], tag["data-title"]) for tag in image_list.find_all("a")]
+
+# Class token test for XPath, equivalent to BeautifulSoup's class_="..."
+def xpath_class(cls: str) -> str:
+	return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+# lxml backend using precompiled XPath expressions.
+class LXMLParser(BS4Parser):
+	name: str = "lxml"
+
+	def __init__(self) -> None:
+		self.xp_last_page = lxml.etree.XPath(f"//span[{xpath_class('current')} and {xpath_class('next')}]")
+		self.xp_cards = lxml.etree.XPath("//div[contains(@class, 'games-grid-card')]")
+		self.xp_card_link = lxml.etree.XPath("(.//a)[1]/@href")
+		self.xp_card_title = lxml.etree.XPath(f"(.//div[{xpath_class('cardTitle')}]//h3)[1]")
+		self.xp_name = lxml.etree.XPath(f"(//section[{xpath_class('heroSection')}]//h1)[1]")
+		self.xp_rating = lxml.etree.XPath("(//span[@id='yourRatingShort'])[1]")
+		self.xp_release = lxml.etree.XPath(
+			f"((//div[contains(@class, 'infoCards')])[1]//div[{xpath_class('cardHeading')}]//span[.='Release Date'])[1]/../../descendant::h6[1]"
+		)
+		self.xp_heading = lxml.etree.XPath("(//h5[.=$heading])[1]")
+		self.xp_image_list = lxml.etree.XPath("(//div[contains(@class, 'image-list')])[1]")
+
+	def parse(self, content: str):
+		return lxml.html.fromstring(content)
+
+	def is_last_page(self, tree) -> bool:
+		return len(self.xp_last_page(tree)) > 0
+
+	def search_cards(self, tree) -> list[tuple[str, str]]:
+		return [(self.xp_card_title(card)[0].text_content(), self.xp_card_link(card)[0]) for card in self.xp_cards(tree)]
+
+	# Get the text of the first element matched by an XPath expression.
+	# return: The text, or None if nothing matched.
+	def first_text(self, xpath, tree) -> str:
+		matches = xpath(tree)
+		if len(matches) == 0:
+			return None
+		return matches[0].text_content()
+
+	# Get the detail card under the given h5 heading.
+	# return: The card element, or None if the heading is missing.
+	def detail_card(self, tree, heading: str):
+		matches = self.xp_heading(tree, heading = heading)
+		if len(matches) == 0:
+			return None
+		return matches[0].getparent()
+
+	def metadata_fields(self, tree) -> dict:
+		fields = {
+			"name": self.first_text(self.xp_name, tree),
+			"rating": self.first_text(self.xp_rating, tree),
+			"release": self.first_text(self.xp_release, tree),
+		}
+
+		for field in LB_LIST_FIELDS:
+			card = self.detail_card(tree, field)
+			fields[field.lower()] = None if card == None else [tag.text_content() for tag in card.iter("a")]
+
+		for key, heading, tag in (("desc", "Overview", "p"), ("video", "Video", "a")):
+			card = self.detail_card(tree, heading)
+			fields[key] = None
+			if card != None:
+				fields[key] = next((element.text_content() for element in card.iter(tag)), None)
+
+		return fields
+
+	def image_links(self, tree) -> list[tuple[str, str]]:
+		image_list = self.xp_image_list(tree)
+		if len(image_list) == 0:
+			return None
+		return [(tag.get("href"), tag.get("data-title")) for tag in image_list[0].iter("a")]
+
+# Parser backends by name
+LB_PARSERS = {
+	"bs4": BS4Parser,
+	"lxml": LXMLParser,
+}
+
+# Get a parser backend.
+# name: A key of LB_PARSERS, or "auto" for the fastest available backend.
+# return: The parser. Falls back to BS4Parser if the requested backend is not available.
+def get_parser(name: str = "auto") -> BS4Parser:
+	if name == "auto":
+		name = "lxml"
+	if name == "lxml" and lxml == None:
+		name = "bs4"
+	if not name in LB_PARSERS:
+		name = "bs4"
+	return LB_PARSERS[name]()
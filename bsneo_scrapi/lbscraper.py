@@ -1,12 +1,23 @@
-from typing import Callable
+from typing import Callable, Iterator
 from pathlib import Path
-from bs4 import BeautifulSoup
-import re, json, requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from functools import lru_cache
+import re
 
 from .paths import *
 from .scraper import Scraper
+from .http_client import HTTPClient
+from .journal import ScrapeJournal, run_key
+from .metadata_store import get_metadata_store
+from .page_cache import PageCache, PAGE_CACHE_SIZE_MB
+from .lbcatalog import LBCatalog
+from .lbparser import get_parser, LB_LIST_FIELDS
+from .fuzzy import FuzzyIndex, FUZZY_THRESHOLD
 from .platform import *
 from .formatting import *
+from .options import get_option
+from .throttle import Throttle
 
 #
 # LBScraper
@@ -51,18 +62,96 @@ LB_REGION_CONV = {
 	"New Zealand": "nz"
 }
 
+# Any descriptor of LB_DESCRIPTOR_CONV, and each descriptor's priority when several match
+LB_DESCRIPTOR_PATTERN = re.compile("|".join(re.escape(descriptor) for descriptor in LB_DESCRIPTOR_CONV))
+LB_DESCRIPTOR_PRIORITY = {descriptor: i for i, descriptor in enumerate(LB_DESCRIPTOR_CONV)}
+
+# The region part of an image title, e.g. "Box - Front (North America)"
+LB_REGION_PATTERN = re.compile(r"\((.*?)\)")
+
+# Default number of search pages requested at the same time
+LB_SEARCH_WORKERS = 4
+
+# Default maximum number of requests per second sent to LaunchBox
+LB_RATE_LIMIT = 5.0
+
+# Default number of matched games whose details and images pages are scraped at the same time
+LB_DETAIL_WORKERS = 4
+
+# Get the asset type and region of a LaunchBox image title.
+# The first descriptor of LB_DESCRIPTOR_CONV found in the title decides the asset type.
+# return: A tuple of (asset type, region code), or None if the title matches no descriptor.
+@lru_cache(maxsize = 1024)
+def classify_image_title(title: str) -> tuple[str, str]:
+	descriptors = LB_DESCRIPTOR_PATTERN.findall(title)
+	if len(descriptors) == 0:
+		return None
+	descriptor = min(descriptors, key = LB_DESCRIPTOR_PRIORITY.get)
+
+	# Get Image Region
+	region = "none"
+	region_match = LB_REGION_PATTERN.search(title)
+	if region_match != None:
+		region = LB_REGION_CONV.get(region_match.group(1), "none")
+
+	return (LB_DESCRIPTOR_CONV[descriptor], region)
+
 class LBScraper(Scraper):
+	scraped_with: str = "lb"
+
 	# Initialize Base Scraper
-	def __init__(self, files: list[Path], platform: Platform, rescrape_existing: bool, send_status: Callable[dict, None], output: Callable[..., None]) -> None:
-		super().__init__(files, platform, rescrape_existing, send_status, output)
+	def __init__(self, files: list[Path], platform: Platform, rescrape_existing: bool, send_status: Callable[dict, None], output: Callable[..., None], settings: dict = {}, http: HTTPClient = None, journal: ScrapeJournal = None) -> None:
+		super().__init__(files, platform, rescrape_existing, send_status, output, settings, http, journal)
+
+		# Number of search pages fetched ahead of the page being searched
+		self.search_workers: int = max(1, get_option(self.settings, "search_workers", LB_SEARCH_WORKERS))
+
+		# HTML parser backend ("auto", "lxml" or "bs4")
+		self.parser = get_parser(get_option(self.settings, "html_parser", "auto"))
+
+		# Number of matched games scraped at the same time
+		self.detail_workers: int = max(1, get_option(self.settings, "detail_workers", LB_DETAIL_WORKERS))
+
+		# Politeness cap shared by every request sent to LaunchBox
+		self.throttle = Throttle(get_option(self.settings, "lb_rate_limit", LB_RATE_LIMIT))
+
+		# Worker pools for matched games and their images pages, created by scrape()
+		self.detail_pool: ThreadPoolExecutor = None
+		self.image_pool: ThreadPoolExecutor = None
+
+		# Persistent page cache, opened by scrape() unless disabled by the page_cache setting
+		self.cache: PageCache = None
+
+		# Platform title catalog, loaded by scrape() unless disabled by the lb_catalog setting
+		self.catalog: LBCatalog = None
+
+		# Index of wanted games for near-miss matching, built by scrape() if fuzzy_match is set
+		self.fuzzy_index: FuzzyIndex = None
 
 	# Request the page and get its contents.
 	# return: An string containing the contents of the URL; if the request failed, the string is blank.
+	#   Fresh pages are served from the page cache, and stale pages are revalidated.
 	def fetch_page(self, link: str) -> str:
+		# Check the cache
+		cache = self.cache
+		cached = None
+		headers = None
+		if cache != None:
+			cached = cache.lookup(link)
+			if cached != None:
+				if cached.fresh:
+					self.output(f"Using cached page for {link}", -1)
+					return cached.body
+				headers = cached.validators()
+
 		# Request page
 		page_req = None
 		try:
-			page_req = requests.get(link, timeout = self.FETCH_TIMEOUT)
+			page_req = self.http.get_page(link, headers, self.throttle)
+			if page_req.status_code == 304 and cached != None:
+				# Cached page is still valid
+				cache.refresh(link)
+				return cached.body
 			if page_req.status_code != 200:
 				self.output(f"Fetching Search Page returned code: {page_req.status_code}", 1)
 				return ""
@@ -70,52 +159,111 @@ class LBScraper(Scraper):
 			self.output(f"Fetching Search Page failed: {e}", 1)
 			return ""
 
+		# Save page to cache
+		if cache != None:
+			cache.store(link, page_req.text, page_req.headers.get("ETag"), page_req.headers.get("Last-Modified"))
+
 		return page_req.text
 
-	# Get a page that may contain a link to the game's full metadata page
+	# Parse a search page into the game cards it lists.
+	# link: The URL of the search page, used for output.
+	# page_content: The contents of the search page.
 	# return: A tuple with two elements.
-	#   The first element contains a list of links to each found game's page.
-	#   The list will be empty if no games were found.
+	#   The first element contains a list of (title, link) pairs, one for each game card on the page.
 	#   The second element indicates if the final page has been reached.
-	#   If any errors occurred while searching, return (None, True).
-	def get_search_page(self, link: str, games: list[str]) -> tuple[list[str], bool]:
-		# Fetch page
-		self.output(f"Searching for game(s) on {link}", 0)
-		page_content = self.fetch_page(link)
+	#   If the page is blank or could not be parsed, return (None, True).
+	def parse_search_page(self, link: str, page_content: str) -> tuple[list[tuple[str, str]], bool]:
+		# A blank page means the request failed
+		if page_content == "":
+			return (None, True)
 
 		# Convert to HTML ETree
-		page_parser = None
 		try:
-			page_parser = BeautifulSoup(page_content, "html.parser")
+			page_tree = self.parser.parse(page_content)
+
+			# Check if this is the last page, and get the title and link of each games-grid-card
+			return (self.parser.search_cards(page_tree), self.parser.is_last_page(page_tree))
 		except Exception as e:
-			self.output(f"Could not convert content at {link} to BeautifulSoup: {e}", 1)
+			self.output(f"Could not parse content at {link} with {self.parser.name}: {e}", 1)
 			return (None, True)
 
-		# Check if this is the last page
-		last_page: bool = page_parser.find("span", class_="current next") != None
-
-		# Search games on page for any matches
-
-		# Get list of games-grid-card
-		card_list = page_parser.find_all("div", class_=re.compile("games-grid-card"))
-
-		# Link to each game page from this page
-		details_links: list[str] = [card.find("a")["href"] for card in card_list]#page_tree.xpath("//div[contains(@class, 'games-grid-card')]/a[1]/@href")
-
-		# Titles of each game on this page
-		titles: list[str] = [card.find("div", class_="cardTitle").h3.text for card in card_list]#page_tree.xpath("//div[@class='cardTitle']/h3[1]/text()")
-
+	# Fetch and parse a single search page.
+	# return: The same as parse_search_page.
+	def fetch_search_page(self, link: str) -> tuple[list[tuple[str, str]], bool]:
+		self.output(f"Searching for game(s) on {link}", 0)
+		return self.parse_search_page(link, self.fetch_page(link))
+
+	# Find the titles that match any of the given games.
+	# Exact matches are found by lookup. If fuzzy matching is on, titles without an exact
+	# match are then looked up in the fuzzy index, among the games that were not matched yet.
+	# titles: A list of (clean title, URL) pairs.
+	# games: The cleaned names of the games being searched for.
+	# return: A list of (clean name, URL) pairs, one for each match.
+	def match_titles(self, titles: list[tuple[str, str]], games) -> list[tuple[str, str]]:
+		if not isinstance(games, (dict, set)):
+			games = set(games)
+
+		matched_games: list[tuple[str, str]] = []
+		unmatched: list[tuple[str, str]] = []
+		for clean_title, url in titles:
+			if clean_title in games:
+				# Match Found
+				self.output(f"Match found for {clean_title}: {url}", -1)
+				matched_games.append((clean_title, url))
+			else:
+				unmatched.append((clean_title, url))
+
+		if self.fuzzy_index != None and len(unmatched) > 0:
+			# Games still unmatched after the exact pass
+			remaining = set(games).difference(game for game, _ in matched_games)
+			for clean_title, url in unmatched:
+				game = self.fuzzy_index.find(clean_title, remaining)
+				if game != None:
+					self.output(f"Fuzzy match found for {game} ({clean_title}): {url}", -1)
+					matched_games.append((game, url))
+					remaining.discard(game)
+
+		return matched_games
+
+	# Find the cards that match any of the given games.
+	# cards: A list of (title, link) pairs, as returned by parse_search_page.
+	# games: The cleaned names of the games being searched for.
+	# return: A list of (clean name, URL) pairs, one for each match.
+	def match_cards(self, cards: list[tuple[str, str]], games) -> list[tuple[str, str]]:
 		self.output(f"Finding games on this page that match...", -1)
-		matched_games: list[str] = []
-		for i in range(len(titles)):
-			clean_title = str_to_clean(titles[i])
-			for game in games:
-				if clean_title == game:
-					# Match Found
-					self.output(f"Match found for {game}: {details_links[i]}", -1)
-					matched_games.append(f"https://gamesdb.launchbox-app.com{details_links[i]}")
-
-		return (matched_games, last_page)
+		clean_titles = strs_to_clean([title for title, _ in cards])
+		urls = [f"https://gamesdb.launchbox-app.com{details_link}" for _, details_link in cards]
+		return self.match_titles(list(zip(clean_titles, urls)), games)
+
+	# Crawl the search pages of this platform in order, fetching up to search_workers pages at once.
+	# Pages after the last page may be requested, but are never yielded.
+	# Closing the iterator early stops the crawl.
+	# url_base: The search page URL, without the page number.
+	# games: The games still being searched for. The crawl stops once this is empty.
+	# return: An iterator of (page number, cards, last page) tuples, in page order.
+	#   cards and last page are as returned by parse_search_page.
+	#   The crawl ends after the last page or after a page fails.
+	def crawl_search_pages(self, url_base: str, games: dict[str, Path], first_page: int = 1) -> Iterator[tuple[int, list[tuple[str, str]], bool]]:
+		pool = ThreadPoolExecutor(max_workers = self.search_workers)
+		pending = deque()
+		next_page = first_page
+		try:
+			while len(games) > 0:
+				# Keep the pool filled with the next pages
+				while len(pending) < self.search_workers:
+					pending.append((next_page, pool.submit(self.fetch_search_page, url_base + str(next_page))))
+					next_page += 1
+
+				# Hand over the oldest page once it arrives
+				page, page_future = pending.popleft()
+				cards, last_page = page_future.result()
+				yield (page, cards, last_page)
+
+				if cards == None or last_page:
+					return
+		finally:
+			# Drop any pages fetched past the end of the crawl
+			pool.shutdown(wait = False, cancel_futures = True)
 
 	# Fetch the page containing the metadata for the game specified by link.
 	# return: blank string if request failed, otherwise the page's contents.
@@ -124,17 +272,29 @@ class LBScraper(Scraper):
 		self.output(f"Getting data from {link}", 0)
 		return self.fetch_page(link)
 
+	# Parse page contents with the parser backend.
+	# content: The page's contents, or a tree which was already parsed.
+	# return: The page's tree, or None if it could not be parsed.
+	def parse_page(self, content):
+		if not isinstance(content, str):
+			return content
+
+		try:
+			return self.parser.parse(content)
+		except Exception as e:
+			self.output(f"Could not parse content with {self.parser.name}: {e}", 1)
+			return None
+
 	# Acquire metadata from data page.
+	# content: The page's contents, or its tree from parse_page.
 	# return: A dict containing textual metadata as specified by format.md, excluding
 	#   "filename" and "imgs"
-	def get_metadata(self, content: str) -> dict:
-		# Convert to HTML ETree
-		page_parser = None
-		try:
-			page_parser = BeautifulSoup(content, "html.parser")
-		except Exception as e:
-			self.output(f"Could not convert content to BeautifulSoup: {e}", 1)
+	def get_metadata(self, content) -> dict:
+		# Convert to HTML ETree and extract raw fields
+		page_tree = self.parse_page(content)
+		if page_tree == None:
 			return None
+		fields = self.parser.metadata_fields(page_tree)
 
 		entry = {}
 
@@ -142,95 +302,70 @@ class LBScraper(Scraper):
 		entry["platform"] = self.platform.pid
 
 		# Get title
-		entry["name"]: str = page_parser.find("section", class_="heroSection").find("h1").text
-		#page_tree.xpath("//section[@class='heroSection']//h1/text()")[0]
+		if fields["name"] == None:
+			self.output(f"No title found on page.", 1)
+			return None
+		entry["name"]: str = fields["name"]
 		entry["clean_name"]: str = str_to_clean(entry["name"])
 
 		# Upper Fields
 		try:
-			entry["rating"] = float(page_parser.find("span", id="yourRatingShort").text) / 5.0
+			entry["rating"] = float(fields["rating"]) / 5.0
 		except:
 			self.output(f"No Rating for {entry['name']}", -1)
 		try:
-			entry["release"] = date_to_iso(page_parser \
-				.find("div", class_=re.compile("infoCards")) \
-				.find("div", class_="cardHeading") \
-				.find("span", string="Release Date") \
-				.parent.parent.h6.text)
-			#date_to_iso(page_tree.xpath("//div[contains(@class, 'infoCards')]//div[@class='cardHeading']/span[contains(.,'Release Date')]/../../h6/text()")[0])
+			entry["release"] = date_to_iso(fields["release"])
 		except:
 			self.output(f"No Release Date for {entry['name']}", -1)
 
 		# Lower Fields
-		for field in ("Genres", "Developers", "Publishers"):
-			try:
-				entry[field.lower()] = [tag.text for tag in page_parser.find("h5", string=f"{field}").parent.find_all("a")]
-				#page_tree.xpath(f"//div[@class='detailCard']/h5[contains(.,'{field}')]/../a/text()")
-			except:
+		for field in LB_LIST_FIELDS:
+			if fields[field.lower()] != None:
+				entry[field.lower()] = fields[field.lower()]
+			else:
 				self.output(f"No {field} for {entry['name']}", -1)
 
-		try:
-			entry["desc"] = page_parser \
-				.find("h5", string="Overview") \
-				.parent.find("p").text
-			#page_tree.xpath("//div[@class='detailCard']/h5[contains(.,'Overview')]/../p/text()")[0]
-			entry["desc"] = entry["desc"].replace("\r\n", "\n")
-		except (IndexError, AttributeError):
+		if fields["desc"] != None:
+			entry["desc"] = fields["desc"]
+		else:
 			self.output(f"No Description for {entry['name']}", -1)
-		try:
-			entry["video"] = page_parser \
-				.find("h5", string="Video") \
-				.parent.find("a").text
-			#page_tree.xpath("//div[@class='detailCard']/h5[contains(.,'Video')]/../a/text()")[0]
-		except (IndexError, AttributeError):
+		if fields["video"] != None:
+			entry["video"] = fields["video"]
+		else:
 			self.output(f"No Video for {entry['name']}", -1)
 
 		self.output(f"Text Metadata Copied.", 0)
 		return entry
 
 	# Get all images from the given game's content page.
+	# content: The page's contents, or its tree from parse_page.
 	# return: A dict containing image descriptors as keys and image urls as values.
 	#   This dictionary will be placed in the metadata's "imgs" field.
-	def get_images(self, content: str) -> dict[str, str]:
-		# Convert to HTML ETree
-		page_parser = None
-		try:
-			page_parser = BeautifulSoup(content, "html.parser")
-		except Exception as e:
-			self.output(f"Could not convert content to BeautifulSoup: {e}", 1)
+	def get_images(self, content) -> dict[str, str]:
+		# Convert to HTML ETree and get Image URLs and titles from page
+		page_tree = self.parse_page(content)
+		if page_tree == None:
+			return None
+		image_links = self.parser.image_links(page_tree)
+		if image_links == None:
+			self.output(f"No image list found on page.", 1)
 			return None
-
-		# Get Image URLs and titles from page
-		imgs = {}
-
-		image_hyperlinks = page_parser.find("div", class_=re.compile("image-list")).find_all("a")
-		image_urls = [tag["href"] for tag in image_hyperlinks]#page_tree.xpath("//div[contains(@class, 'image-list')]//a/@href")
-		image_titles = [tag["data-title"] for tag in image_hyperlinks]#page_tree.xpath("//div[contains(@class, 'image-list')]//a/@data-title")
 
 		# Check titles to see if they match any descriptors
-		for i in range(len(image_urls)):
-			self.output(image_titles[i], -1)
-			for descriptor in LB_DESCRIPTOR_CONV:
-				if descriptor in image_titles[i]:
-					# A descriptor matches with an existing asset, queue downloading this image
-					# Get Image Region
-					region = "none"
-					if re.search(r"\(|\)", image_titles[i]) != None:
-						region = re.search(r"\(.*?\)", image_titles[i]).group(0)[1:-1]
-						if region in LB_REGION_CONV:
-							region = LB_REGION_CONV[region]
-						else:
-							region = "none"
-					# Get asset type from descriptor
-					asset_type = LB_DESCRIPTOR_CONV[descriptor]
-					self.output(f"Is {asset_type}", -1)
-
-					# Add to list or init list if empty
-					if asset_type in imgs:
-						imgs[asset_type].append([image_urls[i], region])
-					else:
-						imgs[asset_type] = [[image_urls[i], region]]
-					break
+		imgs = {}
+		for image_url, image_title in image_links:
+			self.output(image_title, -1)
+			image_type = classify_image_title(image_title)
+			if image_type != None:
+				# A descriptor matches with an existing asset, queue downloading this image
+				asset_type, region = image_type
+				self.output(f"Is {asset_type}", -1)
+
+				# Add to list or init list if empty
+				if asset_type in imgs:
+					imgs[asset_type].append([image_url, region])
+				else:
+					imgs[asset_type] = [[image_url, region]]
 
 		# DEBUG: Output all image URLs
 		for assettype in imgs:
@@ -245,113 +380,253 @@ class LBScraper(Scraper):
 	# return: The list of games to scrape.
 	def get_games_to_scrape(self) -> dict[str, Path]:
 		to_scrape: dict[str, Path] = {}
+
+		# Games already scraped by LBScraper (skipped if rescrape_existing is False)
+		scraped: set[str] = set()
+		if not self.rescrape_existing:
+			scraped = get_metadata_store(self.platform.pid).scraped_with(self.scraped_with)
+
+		skipped: int = 0
 		for path in self.files:
 			# Get clean name
 			clean_name: str = path_to_clean(path)
 
-			# Check if game was already scraped by LBScraper (if rescrape_existing is False)
-			if not self.rescrape_existing:
-				# Get path to metadata JSON
-				game_data_path: Path = PATH_META(self.platform.pid).joinpath(clean_name + ".json")
-				if game_data_path.exists():
-					# Read JSON file
-					with open(game_data_path, "r") as game_metadata:
-						game_json = json.loads(game_metadata.read())
-						# Check if scraped with LBScraper
-						if "lb" in game_json["scraped_with"]:
-							self.output(f"Skipping {clean_name}...", -1)
-							continue
+			# Check if game was already scraped by LBScraper
+			if clean_name in scraped:
+				skipped += 1
+				continue
 
 			# Add to list of games to scrape
-			self.output(f"\t{path} -> {clean_name}", -1)
 			to_scrape[clean_name] = path
 
+		self.output(f"{len(to_scrape)} Game(s) to Scrape, Skipped {skipped} Already Scraped.", -1)
 		return to_scrape
 
+	# Scrape a single matched game, fetching its details and images pages at the same time.
+	# Runs on the detail pool.
+	# data_page: The URL of the game's details page.
+	# return: A tuple with two elements.
+	#   The first element is the game's text metadata, as returned by get_metadata.
+	#   The second element is the game's images, as returned by get_images.
+	def scrape_entry(self, data_page: str) -> tuple[dict, dict]:
+		# Request the images page while the details page is fetched and parsed
+		image_page = self.image_pool.submit(self.get_data_page, data_page.replace("/details/", "/images/"))
+
+		# Get textual metadata, parsing the page once
+		metadata = self.get_metadata(self.parse_page(self.get_data_page(data_page)))
+
+		# Get image links
+		return (metadata, self.get_images(self.parse_page(image_page.result())))
+
+	# Add the games scraped by the detail pool to the list of entries.
+	# in_flight: Maps detail pool futures to the (clean name, path, URL) of the game being scraped.
+	#   Collected futures are removed from this dictionary.
+	# to_scrape: Games which could not be scraped are put back here, so that a later match may retry them.
+	# on_entry: The function which scraped metadata is passed to.
+	# found_count: The number of games found so far.
+	# block: If True, wait for every game in in_flight. Otherwise, only collect finished games.
+	# return: The updated number of games found.
+	def collect_entries(self, in_flight: dict[Future, tuple[str, Path, str]], to_scrape: dict[str, Path], on_entry: Callable[dict, None], found_count: int, block: bool) -> int:
+		if block:
+			done = set(in_flight)
+		else:
+			done = wait(in_flight, timeout = 0, return_when = FIRST_COMPLETED).done
+
+		for entry_future in done:
+			game, path, data_page = in_flight.pop(entry_future)
+
+			metadata = None
+			imgs = None
+			try:
+				metadata, imgs = entry_future.result()
+			except Exception as e:
+				self.output(f"Scraping {data_page} failed: {e}", 1)
+
+			# Check if an error occurred while gathering metadata
+			if metadata == None:
+				self.send_status({"code": "error", "details": f"Could not gather metadata from {data_page}"})
+				to_scrape[game] = path
+				# The catalog may hold an outdated link
+				if self.catalog != None and self.catalog.lookup(game) == data_page:
+					self.catalog.forget(game)
+				continue
+
+			metadata["filename"] = path.name
+
+			# Store the entry under the clean name of its file, even if the page's title
+			# differs (e.g. on a fuzzy match), so that it is recognized as scraped later.
+			# The clean form of the page's title is kept separately.
+			metadata["matched_title"] = metadata["clean_name"]
+			metadata["clean_name"] = game
+
+			# Check if an error occurred while gathering images
+			metadata["imgs"] = imgs
+			if metadata["imgs"] == None:
+				self.send_status({"code": "error", "details": f"Could not gather images for {metadata['name']}"})
+				metadata["imgs"] = []
+
+			# Pass on to the metadata list or the entry stream
+			if self.journal != None:
+				self.journal.record_entry(metadata)
+			on_entry(metadata)
+
+			# Update Status
+			found_count += 1
+			self.send_status({"game": metadata["name"], "found_count": found_count})
+
+		return found_count
+
+	# Queue a found game on the detail pool.
+	# game: The clean name of the game, which is moved from to_scrape to in_flight.
+	# data_page: The URL of the game's details page.
+	def queue_entry(self, game: str, data_page: str, to_scrape: dict[str, Path], in_flight: dict[Future, tuple[str, Path, str]]) -> None:
+		self.send_status({"code": "get", "details": data_page})
+		if self.journal != None:
+			self.journal.record_match(game, data_page)
+		in_flight[self.detail_pool.submit(self.scrape_entry, data_page)] = (game, to_scrape.pop(game), data_page)
+
 	# Scrape game(s) via LaunchBox
-	def scrape(self) -> dict:
+	# on_entry: See Scraper.scrape.
+	def scrape(self, on_entry: Callable[dict, None] = None) -> dict:
 		compiled_metadata = {
 			"entries": [],
-			"scraped_with": "lb",
+			"scraped_with": self.scraped_with,
 			"error": False,
 		}
+		if on_entry == None:
+			on_entry = compiled_metadata["entries"].append
 
 		# Convert filenames to game names and purge already
 		# scraped games (if rescrape_existing == False)
 		self.output(f"Filtering Games Already Scraped...", -1)
 		to_scrape = self.get_games_to_scrape()
-		self.output(f"{to_scrape}", -1)
 
 		# Get LaunchBox Platform ID and system URL
 		lb_pid: str = self.platform.launchbox_id
 		lb_url_base: str = f"https://gamesdb.launchbox-app.com/platforms/games/{lb_pid}/page/"
 
-		# Search page checks
-		page = 1
-		end_reached = False
-
 		# Set bar total
 		self.send_status({"code": "search", "to_scrape_total": len(to_scrape), "found_count": 0})
 
-		# Search across each page for this system
-		self.output(f"Beginning Search for Games...", 0)
-		found_count: int = 0
-		while len(to_scrape) > 0 and not end_reached:
-			# Update status & bar
-			self.send_status({"code": "search", "details": f"Page: {page}", "found_count": found_count})
-			# Scrape search page
-			found_urls, end_reached = self.get_search_page(lb_url_base + str(page), to_scrape)
-			page += 1
-
-			# Check if an error occurred while searching
-			if found_urls == None:
-				# Handle Request error
-				self.output(f"An Error Occurred while searching. Quitting...", 1)
-				compiled_metadata["error"] = True
-				self.send_status({"code": "error", "details": "Could Not Reach LaunchBox."})
-				return compiled_metadata
-			else:
-				# Get metadata for each found game
-				for data_page in found_urls:
-					# Update Status
-					self.send_status({"code": "get", "details": data_page})
-
-					# Get textual metadata
-					data_page_content: str = self.get_data_page(data_page)
-					metadata = self.get_metadata(data_page_content)
-					# Check if an error occurred while gathering metadata
-					if metadata == None:
-						self.send_status({"code": "error", "details": f"Could not gather metadata from {data_page}"})
-						continue
-
-					metadata["filename"] = to_scrape[metadata["clean_name"]].name
-
-					# Get image links
-					image_page_content: str = self.get_data_page(data_page.replace("/details/", "/images/"))
-					metadata["imgs"] = self.get_images(image_page_content)
-					# Check if an error occurred while gathering metadata
-					if metadata["imgs"] == None:
-						self.send_status({"code": "error", "details": f"Could not gather images for {metadata['name']}"})
-						metadata["imgs"] = []
-
-					# Add to metadata list
-					compiled_metadata["entries"].append(metadata)
-
-					# Delete entry in to_scrape as this game has been scraped
-					del to_scrape[metadata["clean_name"]]
-
-					# Update Status
-					found_count += 1
-					self.send_status({"game": metadata["name"], "found_count": found_count})
-
-		# Set scraping progress to done
-		self.send_status({"to_scrape_missing": len(to_scrape) - found_count})
-		return compiled_metadata
-
-
+		# Open page cache
+		if get_option(self.settings, "page_cache", True):
+			self.cache = PageCache(size_mb = get_option(self.settings, "page_cache_size_mb", PAGE_CACHE_SIZE_MB))
 
+		# Matched games are scraped by the detail pool while the search continues
+		self.detail_pool = ThreadPoolExecutor(max_workers = self.detail_workers)
+		self.image_pool = ThreadPoolExecutor(max_workers = self.detail_workers)
+		in_flight: dict[Future, tuple[str, Path, str]] = {}
 
+		# Index games for fuzzy matching
+		if get_option(self.settings, "fuzzy_match", False):
+			self.fuzzy_index = FuzzyIndex(to_scrape, get_option(self.settings, "fuzzy_threshold", FUZZY_THRESHOLD))
 
+		# Resume an interrupted run: games it scraped are passed on as they are,
+		# games it matched are scraped without searching for them again.
+		found_count: int = 0
+		run = run_key(path_to_clean(path) for path in self.files)
+		if self.journal != None and self.journal.resumable():
+			resumed = self.journal.pending_entries(to_scrape)
+			self.output(f"Resuming Interrupted Scrape ({len(resumed)} game(s) scraped, {self.journal.searched_page(run)} page(s) searched)...", 0)
+			for entry in resumed:
+				to_scrape.pop(entry["clean_name"])
+				on_entry(entry)
+				found_count += 1
+
+			for game in self.journal.done:
+				to_scrape.pop(game, None)
+
+			for game, data_page in self.journal.pending_matches().items():
+				if game in to_scrape:
+					self.queue_entry(game, data_page, to_scrape, in_flight)
+
+		# Look up games in the platform's catalog first
+		first_page = 1
+		search_games = to_scrape
+		if get_option(self.settings, "lb_catalog", True):
+			self.catalog = LBCatalog(self.platform.pid)
+			for game in list(to_scrape):
+				data_page = self.catalog.lookup(game)
+				if data_page != None:
+					self.output(f"Catalog entry found for {game}: {data_page}", -1)
+					self.queue_entry(game, data_page, to_scrape, in_flight)
+
+			# Closest catalogued title for each remaining game
+			if self.fuzzy_index != None and len(to_scrape) > 0:
+				catalog_index = FuzzyIndex(self.catalog.titles, self.fuzzy_index.threshold)
+				for game in list(to_scrape):
+					title = catalog_index.find(game)
+					if title != None:
+						self.output(f"Fuzzy catalog entry found for {game} ({title}): {self.catalog.lookup(title)}", -1)
+						self.queue_entry(game, self.catalog.lookup(title), to_scrape, in_flight)
+
+			# Only crawl pages which the catalog is missing
+			first_page = self.catalog.resume_page()
+			if first_page == None:
+				self.output(f"Catalog is up to date, not searching for {len(to_scrape)} missing game(s).", 0)
+				search_games = {}
+		elif self.journal != None:
+			# Without a catalog, continue after the last page searched by an interrupted run
+			# over the same games. Its matches on those pages were resumed above.
+			first_page = self.journal.searched_page(run) + 1
 
+		# Search across each page for this system
+		self.output(f"Beginning Search for Games...", 0)
+		search_pages = self.crawl_search_pages(lb_url_base, search_games, first_page or 1)
+		try:
+			for page, cards, end_reached in search_pages:
+				if self.stopping.is_set():
+					self.output(f"Scrape stopped, not searching further.", 0)
+					break
 
+				# Update status & bar
+				self.send_status({"code": "search", "details": f"Page: {page}", "found_count": found_count})
+
+				# Check if an error occurred while searching
+				if cards == None:
+					# Handle Request error
+					self.output(f"An Error Occurred while searching. Quitting...", 1)
+					compiled_metadata["error"] = True
+					self.send_status({"code": "error", "details": "Could Not Reach LaunchBox."})
+					return compiled_metadata
+
+				# Record page in the catalog, saving it so an interrupted run resumes after this page
+				if self.catalog != None:
+					self.catalog.add_page(page, cards, end_reached)
+					self.catalog.save()
+
+				# Queue each found game on the detail pool
+				for game, data_page in self.match_cards(cards, to_scrape):
+					# Skip duplicate matches of a game that is scraped already
+					if game in to_scrape:
+						self.queue_entry(game, data_page, to_scrape, in_flight)
+				if self.journal != None:
+					self.journal.record_page(page, run)
+
+				# Collect games which have finished in the meantime
+				found_count = self.collect_entries(in_flight, to_scrape, on_entry, found_count, False)
+
+				# Stop searching once every game was found, but retry games that failed
+				if len(to_scrape) == 0 and len(in_flight) > 0:
+					found_count = self.collect_entries(in_flight, to_scrape, on_entry, found_count, True)
+
+			# Wait for the remaining games, unless the scrape was stopped
+			if not self.stopping.is_set():
+				found_count = self.collect_entries(in_flight, to_scrape, on_entry, found_count, True)
+		finally:
+			search_pages.close()
+			self.detail_pool.shutdown(wait = False, cancel_futures = True)
+			self.image_pool.shutdown(wait = False, cancel_futures = True)
+			if self.cache != None:
+				self.cache.close()
+				self.cache = None
+			if self.catalog != None:
+				self.catalog.save()
+				self.catalog = None
+			self.fuzzy_index = None
+			if self.journal != None:
+				self.journal.close()
 
+		# Set scraping progress to done
+		self.send_status({"to_scrape_missing": len(to_scrape) - found_count})
+		return compiled_metadata
@@ -0,0 +1,204 @@
+from pathlib import Path
+import os, shutil, sqlite3, threading
+
+from .paths import *
+
+#
+# MediaStore
+# Content-addressed store of downloaded media, shared by every platform.
+# Each file is kept once under its SHA-256 hash, and the per-game media paths are
+# hard links (or symbolic links) to it. Where neither can be made, the store moves
+# its blobs out as plain files instead of keeping a second copy.
+#
+
+# Move a file to dest, replacing any file there. If the two are on different file systems, the file is
+# copied to a temporary file next to dest first, so that dest is never left holding a partial copy.
+def move_file(src: Path, dest: Path) -> None:
+	try:
+		os.replace(src, dest)
+		return
+	except OSError:
+		pass
+
+	temp_dest = dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}.move")
+	try:
+		shutil.copyfile(src, temp_dest)
+		os.replace(temp_dest, dest)
+	finally:
+		Path(temp_dest).unlink(missing_ok = True)
+	Path(src).unlink(missing_ok = True)
+
+class MediaStore():
+	# Number of info compilers of this process downloading into the store, guarded by users_lock.
+	# collect_garbage only runs while it is 0, and holds the lock so no download starts meanwhile.
+	users: int = 0
+	users_lock = threading.Lock()
+
+	# root: The directory holding the blobs and their URL index.
+	def __init__(self, root: Path = PATH_BLOBS) -> None:
+		self.root = root
+		self.tmp_dir = root.joinpath("tmp/")
+		self.db_path = root.joinpath("index.db")
+		self.lock = threading.Lock()
+
+		# Index database, opened on first use
+		self.db: sqlite3.Connection = None
+
+		# Cleared once a blob could not be linked, after which nothing is linked anymore
+		self.linkable: bool = True
+
+	# Get the index database, opening it if needed. Must be called with the lock held.
+	def connection(self) -> sqlite3.Connection:
+		if self.db == None:
+			check_path(self.tmp_dir)
+			self.db = sqlite3.connect(self.db_path, timeout = 30, check_same_thread = False)
+			self.db.execute("PRAGMA journal_mode=WAL")
+			self.db.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, hash TEXT NOT NULL)")
+			self.db.execute("CREATE INDEX IF NOT EXISTS urls_hash ON urls (hash)")
+			self.db.commit()
+		return self.db
+
+	# Get the path of the blob with the given hash.
+	def blob_path(self, digest: str) -> Path:
+		return self.root.joinpath(digest[:2], digest)
+
+	# Get a directory for temporary files, on the same file system as the blobs.
+	def temp_dir(self) -> Path:
+		check_path(self.tmp_dir)
+		return self.tmp_dir
+
+	# Look up the blob downloaded from a URL.
+	# return: The blob's path, or None if the URL was never stored.
+	def lookup(self, link: str) -> Path:
+		with self.lock:
+			row = self.connection().execute("SELECT hash FROM urls WHERE url = ?", (link,)).fetchone()
+		if row == None:
+			return None
+
+		blob = self.blob_path(row[0])
+		return blob if blob.exists() else None
+
+	# Move a downloaded file into the store. If a blob with the same contents exists, the file is dropped.
+	# temp_path: The downloaded file, in temp_dir().
+	# digest: The SHA-256 hex digest of the file.
+	# link: The URL the file was downloaded from.
+	# return: The blob's path.
+	def add(self, temp_path: Path, digest: str, link: str) -> Path:
+		blob = self.blob_path(digest)
+		with self.lock:
+			if blob.exists():
+				Path(temp_path).unlink(missing_ok = True)
+			else:
+				check_path(blob.parent)
+				os.replace(temp_path, blob)
+
+			db = self.connection()
+			db.execute("INSERT OR REPLACE INTO urls VALUES (?, ?)", (link, digest))
+			db.commit()
+		return blob
+
+	# Place a blob at dest, replacing any file there.
+	# A hard link is tried first, then a symbolic link.
+	# return: True if dest was linked, False if the file system supports neither link.
+	def link(self, blob: Path, dest: Path) -> bool:
+		if not self.linkable:
+			return False
+
+		temp_dest = dest.with_name(f"{dest.name}.{os.getpid()}.{threading.get_ident()}.link")
+		temp_dest.unlink(missing_ok = True)
+		try:
+			os.link(blob, temp_dest)
+		except OSError:
+			try:
+				os.symlink(blob, temp_dest)
+			except OSError:
+				self.linkable = False
+				return False
+		os.replace(temp_dest, dest)
+		return True
+
+	# Move a blob out of the store to dest, as a plain file, and forget the URLs it was downloaded from.
+	# Used where the blob cannot be linked, so the file is not kept twice.
+	def release(self, blob: Path, dest: Path) -> None:
+		with self.lock:
+			move_file(blob, dest)
+			db = self.connection()
+			db.execute("DELETE FROM urls WHERE hash = ?", (blob.name,))
+			db.commit()
+
+	# Place the blob downloaded from a URL at dest, if the URL was stored before.
+	# return: True if dest was placed, False otherwise.
+	def link_url(self, link: str, dest: Path) -> bool:
+		if not self.linkable:
+			return False
+		blob = self.lookup(link)
+		if blob == None:
+			return False
+		return self.link(blob, dest)
+
+	# Mark the store as used by a download pass, until release_use is called.
+	def acquire_use(self) -> None:
+		with MediaStore.users_lock:
+			MediaStore.users += 1
+
+	# End a use started with acquire_use.
+	def release_use(self) -> None:
+		with MediaStore.users_lock:
+			MediaStore.users = max(0, MediaStore.users - 1)
+
+	# Remove every blob which no media file of any platform links to, and its URLs.
+	# Does nothing while media is being downloaded, as new blobs are not linked yet.
+	# return: The number of blobs removed and the bytes freed, or None if media is being downloaded.
+	def collect_garbage(self) -> tuple[int, int]:
+		with MediaStore.users_lock:
+			if MediaStore.users > 0:
+				return None
+			if not self.root.is_dir():
+				return (0, 0)
+
+			# Find the blobs linked from every platform's media directory
+			linked_inodes: set[tuple[int, int]] = set()
+			linked_names: set[str] = set()
+			check_base_path()
+			for sys_dir in PATH_BASE.iterdir():
+				media_dir = sys_dir.joinpath("media")
+				if not media_dir.is_dir():
+					continue
+				for dir_path, dir_names, file_names in os.walk(media_dir):
+					for file_name in file_names:
+						file_path = Path(dir_path, file_name)
+						if file_path.is_symlink():
+							linked_names.add(Path(os.readlink(file_path)).name)
+						else:
+							file_stat = file_path.stat()
+							linked_inodes.add((file_stat.st_dev, file_stat.st_ino))
+
+			removed = 0
+			freed = 0
+			with self.lock:
+				db = self.connection()
+				for blob_dir in self.root.iterdir():
+					if not blob_dir.is_dir() or blob_dir == self.tmp_dir:
+						continue
+					for blob in blob_dir.iterdir():
+						blob_stat = blob.stat()
+						if blob.name in linked_names or (blob_stat.st_dev, blob_stat.st_ino) in linked_inodes:
+							continue
+						blob.unlink()
+						db.execute("DELETE FROM urls WHERE hash = ?", (blob.name,))
+						removed += 1
+						freed += blob_stat.st_size
+				db.commit()
+
+				# Leftovers of interrupted downloads
+				for temp_file in self.tmp_dir.iterdir():
+					temp_file.unlink(missing_ok = True)
+
+			return (removed, freed)
+
+	# Close the index database. It is opened again if the store is used later.
+	def close(self) -> None:
+		with self.lock:
+			if self.db != None:
+				self.db.close()
+				self.db = None
@@ -0,0 +1,143 @@
+from pathlib import Path
+from typing import Callable, Iterator
+import json, sqlite3, threading
+
+from .paths import *
+
+#
+# MetadataStore
+# Per-platform SQLite database of scraped metadata, one row per game.
+# Replaces the JSON file per game in PATH_META, which is migrated on first use.
+#
+
+class MetadataStore():
+	# pid: The platform's ID.
+	# db_path: The SQLite file holding the metadata. PATH_META_DB(pid) by default.
+	def __init__(self, pid: str, db_path: Path = None) -> None:
+		self.pid = pid
+		self.db_path = db_path if db_path != None else PATH_META_DB(pid)
+		self.lock = threading.Lock()
+
+		check_path(self.db_path.parent)
+		self.db = sqlite3.connect(self.db_path, timeout = 30, check_same_thread = False)
+		self.db.execute("PRAGMA journal_mode=WAL")
+		self.db.execute("""
+			CREATE TABLE IF NOT EXISTS entries (
+				clean_name TEXT PRIMARY KEY,
+				scraped_with TEXT NOT NULL,
+				data TEXT NOT NULL
+			)
+		""")
+		self.db.execute("CREATE INDEX IF NOT EXISTS entries_scraped_with ON entries (scraped_with)")
+		self.db.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT)")
+		self.db.commit()
+
+		# Manifest mapping the clean name of every entry to its scraped_with. Loaded on first use,
+		# kept up to date by put() and update(), and reloaded once another connection changed the database.
+		self.manifest: dict[str, str] = None
+		self.manifest_version: int = None
+
+		self.migrate()
+
+	# Load the manifest if it is missing or stale. Must be called with the lock held.
+	def load_manifest(self) -> dict[str, str]:
+		# data_version only changes when another connection commits
+		version = self.db.execute("PRAGMA data_version").fetchone()[0]
+		if self.manifest == None or version != self.manifest_version:
+			self.manifest = dict(self.db.execute("SELECT clean_name, scraped_with FROM entries"))
+			self.manifest_version = version
+		return self.manifest
+
+	# Record a written entry in the manifest, if it is loaded. Must be called with the lock held.
+	def update_manifest(self, entry: dict) -> None:
+		if self.manifest != None:
+			self.manifest[entry["clean_name"]] = entry.get("scraped_with", "")
+
+	# Import the JSON metadata files of PATH_META, once.
+	# Entries already in the database are kept. The JSON files are left in place.
+	def migrate(self) -> None:
+		with self.lock:
+			if self.db.execute("SELECT value FROM info WHERE key = 'json_migrated'").fetchone() != None:
+				return
+
+			meta_dir = PATH_META(self.pid)
+			if meta_dir.is_dir():
+				for meta_file in meta_dir.glob("*.json"):
+					try:
+						with open(meta_file, "r") as meta_content:
+							entry = json.loads(meta_content.read())
+					except (OSError, ValueError):
+						continue
+					self.db.execute(
+						"INSERT OR IGNORE INTO entries VALUES (?, ?, ?)",
+						(entry["clean_name"], entry.get("scraped_with", ""), json.dumps(entry))
+					)
+
+			self.db.execute("INSERT INTO info VALUES ('json_migrated', '1')")
+			self.db.commit()
+
+	# Get the entry of a game.
+	# return: The entry, or None if the game was never scraped.
+	def get(self, clean_name: str) -> dict:
+		with self.lock:
+			row = self.db.execute("SELECT data FROM entries WHERE clean_name = ?", (clean_name,)).fetchone()
+		return json.loads(row[0]) if row != None else None
+
+	# Add or replace the entry of a game.
+	def put(self, entry: dict) -> None:
+		data = json.dumps(entry)
+		with self.lock:
+			self.db.execute(
+				"INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+				(entry["clean_name"], entry.get("scraped_with", ""), data)
+			)
+			self.db.commit()
+			self.update_manifest(entry)
+
+	# Change the entry of a game in place, without other writes in between.
+	# update: Function changing the entry.
+	# return: True if the entry was updated, False if the game was never scraped.
+	def update(self, clean_name: str, update: Callable[dict, None]) -> bool:
+		with self.lock:
+			row = self.db.execute("SELECT data FROM entries WHERE clean_name = ?", (clean_name,)).fetchone()
+			if row == None:
+				return False
+
+			entry = json.loads(row[0])
+			update(entry)
+			self.db.execute(
+				"UPDATE entries SET scraped_with = ?, data = ? WHERE clean_name = ?",
+				(entry.get("scraped_with", ""), json.dumps(entry), clean_name)
+			)
+			self.db.commit()
+			self.update_manifest(entry)
+			return True
+
+	# Get the clean names of the games scraped with a scraper, from the manifest.
+	# An entry counts if its scraped_with contains the scraper's ID, as it may list several scrapers.
+	def scraped_with(self, scraper: str) -> set[str]:
+		with self.lock:
+			return {clean_name for clean_name, scraped_with in self.load_manifest().items() if scraper in scraped_with}
+
+	# Iterate over every entry, ordered by clean name.
+	def entries(self) -> Iterator[dict]:
+		with self.lock:
+			rows = self.db.execute("SELECT data FROM entries ORDER BY clean_name").fetchall()
+		for row in rows:
+			yield json.loads(row[0])
+
+	# Get the number of entries.
+	def __len__(self) -> int:
+		with self.lock:
+			return self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+# Open metadata stores, shared by the scrapers, info compilers and exporters of a platform
+METADATA_STORES: dict[str, MetadataStore] = {}
+METADATA_STORES_LOCK = threading.Lock()
+
+# Get the metadata store of a platform, opening it on first use.
+def get_metadata_store(pid: str) -> MetadataStore:
+	with METADATA_STORES_LOCK:
+		if not pid in METADATA_STORES:
+			METADATA_STORES[pid] = MetadataStore(pid)
+		return METADATA_STORES[pid]
@@ -0,0 +1,22 @@
+#
+# options
+# Helpers for reading optional worker settings
+#
+
+# Gets a setting from the given settings dictionary.
+# settings: The settings dictionary, as given to Worker.set_worker_settings.
+# option: The name of the setting.
+# default: The value to use if the setting is missing or has the wrong type.
+#   Float settings also accept integer values.
+# return: The setting's value, or default.
+def get_option(settings: dict, option: str, default):
+	if not option in settings:
+		return default
+
+	value = settings[option]
+	if type(value) == type(default):
+		return value
+	if type(default) == float and type(value) == int:
+		return float(value)
+
+	return default
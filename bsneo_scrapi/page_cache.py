@@ -0,0 +1,150 @@
+from pathlib import Path
+import sqlite3, threading, time
+
+from .paths import *
+
+#
+# PageCache
+# Persistent cache of fetched pages, keyed by URL
+#
+
+# Constants
+# Seconds for which a cached page is served without asking the server, by page class
+PAGE_CACHE_TTL = {
+	"search": 24 * 60 * 60,
+	"details": 7 * 24 * 60 * 60,
+	"images": 7 * 24 * 60 * 60,
+	"other": 24 * 60 * 60,
+}
+
+# Default maximum size of the cache in megabytes
+PAGE_CACHE_SIZE_MB = 256
+
+# Fraction of the maximum size that the cache is trimmed down to once it is full
+PAGE_CACHE_TRIM = 0.9
+
+# Get the page class of a URL, which decides how long the page stays fresh.
+# return: A key of PAGE_CACHE_TTL.
+def page_class(link: str) -> str:
+	if "/details/" in link:
+		return "details"
+	if "/images/" in link:
+		return "images"
+	if "/platforms/games/" in link:
+		return "search"
+	return "other"
+
+# A page read from the cache
+class CachedPage():
+	def __init__(self, body: str, etag: str, last_modified: str, fresh: bool) -> None:
+		# Page contents
+		self.body = body
+		# Validators sent by the server when the page was fetched (None if missing)
+		self.etag = etag
+		self.last_modified = last_modified
+		# Whether the page may be used without revalidating it
+		self.fresh = fresh
+
+	# Get the headers needed to revalidate this page with a conditional request.
+	def validators(self) -> dict:
+		headers = {}
+		if self.etag != None:
+			headers["If-None-Match"] = self.etag
+		if self.last_modified != None:
+			headers["If-Modified-Since"] = self.last_modified
+		return headers
+
+class PageCache():
+	# db_path: The SQLite file holding the cache.
+	# size_mb: The maximum size of all cached pages. The least recently used pages are evicted past this size.
+	def __init__(self, db_path: Path = PATH_CACHE.joinpath("pages.db"), size_mb: int = PAGE_CACHE_SIZE_MB) -> None:
+		check_path(db_path.parent)
+
+		self.max_size: int = size_mb * 1024 * 1024
+		self.lock = threading.Lock()
+
+		self.db = sqlite3.connect(db_path, timeout = 30, check_same_thread = False)
+		self.db.execute("PRAGMA journal_mode=WAL")
+		self.db.execute("""
+			CREATE TABLE IF NOT EXISTS pages (
+				url TEXT PRIMARY KEY,
+				body TEXT NOT NULL,
+				etag TEXT,
+				last_modified TEXT,
+				fetched REAL NOT NULL,
+				accessed REAL NOT NULL,
+				size INTEGER NOT NULL
+			)
+		""")
+		self.db.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed)")
+		self.db.commit()
+
+		# Running total of the cache size
+		self.size: int = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+	# Look up a page in the cache.
+	# return: The cached page, or None if the URL is not cached.
+	def lookup(self, link: str) -> CachedPage:
+		with self.lock:
+			if self.db == None:
+				return None
+			row = self.db.execute("SELECT body, etag, last_modified, fetched FROM pages WHERE url = ?", (link,)).fetchone()
+			if row == None:
+				return None
+
+			now = time.time()
+			self.db.execute("UPDATE pages SET accessed = ? WHERE url = ?", (now, link))
+			self.db.commit()
+
+		body, etag, last_modified, fetched = row
+		return CachedPage(body, etag, last_modified, now - fetched < PAGE_CACHE_TTL[page_class(link)])
+
+	# Add or replace a page in the cache, evicting old pages if the cache is full.
+	def store(self, link: str, body: str, etag: str = None, last_modified: str = None) -> None:
+		size = len(body.encode("utf-8"))
+		now = time.time()
+		with self.lock:
+			if self.db == None:
+				return
+			old = self.db.execute("SELECT size FROM pages WHERE url = ?", (link,)).fetchone()
+			if old != None:
+				self.size -= old[0]
+
+			self.db.execute(
+				"INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+				(link, body, etag, last_modified, now, now, size)
+			)
+			self.size += size
+
+			if self.size > self.max_size:
+				self.evict()
+			self.db.commit()
+
+	# Mark a cached page as fresh again after the server confirmed it is unchanged.
+	def refresh(self, link: str) -> None:
+		now = time.time()
+		with self.lock:
+			if self.db == None:
+				return
+			self.db.execute("UPDATE pages SET fetched = ?, accessed = ? WHERE url = ?", (now, now, link))
+			self.db.commit()
+
+	# Remove the least recently used pages until the cache is trimmed down.
+	# Must be called with the lock held.
+	def evict(self) -> None:
+		target = self.max_size * PAGE_CACHE_TRIM
+		rows = self.db.execute("SELECT url, size FROM pages ORDER BY accessed")
+		evicted = []
+		for url, size in rows:
+			if self.size <= target:
+				break
+			evicted.append((url,))
+			self.size -= size
+		self.db.executemany("DELETE FROM pages WHERE url = ?", evicted)
+
+	# Close the cache database. Any later calls act as if the cache were empty.
+	def close(self) -> None:
+		with self.lock:
+			if self.db != None:
+				self.db.close()
+				self.db = None
@@ -1,7 +1,8 @@
 from pathlib import Path
 from platformdirs import (
 	user_data_dir,
-	user_config_dir
+	user_config_dir,
+	user_cache_dir
 )
 
 #
@@ -18,6 +19,8 @@ APP_AUTHOR = "pquirrel"
 
 PATH_BASE = Path(user_data_dir(APP_NAME, APP_AUTHOR))
 PATH_CONFIG = Path(user_config_dir(APP_NAME, APP_AUTHOR)).joinpath("config.json")
+PATH_CACHE = Path(user_cache_dir(APP_NAME, APP_AUTHOR))
+PATH_BLOBS = Path(user_data_dir(APP_NAME + "-media", APP_AUTHOR))
 
 def PATH_SYS(pid: str):
 	return PATH_BASE.joinpath(pid + "/")
@@ -28,6 +31,9 @@ def PATH_MEDIA(pid: str):
 def PATH_META(pid: str):
 	return PATH_SYS(pid).joinpath("metadata/")
 
+def PATH_META_DB(pid: str):
+	return PATH_SYS(pid).joinpath("metadata.db")
+
 # Check if base directory exists, create if it doesn't
 def check_base_path():
 	if not(PATH_BASE.exists()):
@@ -1,10 +1,6 @@
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Iterable, Iterator
 
-import re, json
-
-from .paths import *
-from .region import *
 from .exporter import Exporter
 from .platform import Platform
 from .formatting import str_to_clean
@@ -63,39 +59,61 @@ PEGASUS_DATA_ORDER = [
 	"players",
 ]
 
+# Whether each field is list type, by field name. Precomputed for the fields bsneo writes,
+# other fields are added on first use.
+LIST_TYPE_FIELDS: dict[str, bool] = {
+	field: any(prefix in field for prefix in LIST_TYPE_FIELD_PREFIXES)
+	for field in (*PEGASUS_DATA_ORDER, *FIELD_PREFIX_TO_PLURAL, *FIELD_PREFIX_TO_PLURAL.values(), "collection", "shortname", "launch")
+}
+
+# Determines whether or not the given field is list type via LIST_TYPE_FIELD_PREFIXES,
+# looking it up in LIST_TYPE_FIELDS.
+def field_is_list_type(field: str) -> bool:
+	list_type = LIST_TYPE_FIELDS.get(field)
+	if list_type == None:
+		list_type = any(prefix in field for prefix in LIST_TYPE_FIELD_PREFIXES)
+		LIST_TYPE_FIELDS[field] = list_type
+	return list_type
+
+# Plural list type fields, which non-plural fields are merged into
+PLURAL_FIELDS = frozenset(FIELD_PREFIX_TO_PLURAL.values())
+
+# Finds the plural field a non-plural list type field is merged into, by its first prefix in
+# LIST_TYPE_FIELD_PREFIXES other than "file".
+# return: The plural field, or None if the field is kept as is.
+def find_plural_field(field: str) -> str:
+	if field in PLURAL_FIELDS:
+		return None
+	for prefix in LIST_TYPE_FIELD_PREFIXES:
+		if prefix != "file" and prefix in field:
+			return FIELD_PREFIX_TO_PLURAL[prefix]
+	return None
+
+# The plural field of each field, by field name, as found by find_plural_field.
+# Precomputed for the fields bsneo writes, other fields are added on first use.
+PLURAL_OF_FIELDS: dict[str, str] = {
+	field: find_plural_field(field)
+	for field in (*PEGASUS_DATA_ORDER, *FIELD_PREFIX_TO_PLURAL, *PLURAL_FIELDS, "collection", "shortname", "launch")
+}
+
+# Looks up the plural field of a field in PLURAL_OF_FIELDS.
+def plural_of_field(field: str) -> str:
+	if not field in PLURAL_OF_FIELDS:
+		PLURAL_OF_FIELDS[field] = find_plural_field(field)
+	return PLURAL_OF_FIELDS[field]
+
+# Converts the fields of a block being parsed to their values, joining the pieces of text fields.
+def join_block(block: dict[str, list[str]]) -> dict:
+	return {field: values if field_is_list_type(field) else "".join(values) for field, values in block.items()}
+
 class PegasusExporter(Exporter):
 	# Initialize Base Exporter
-	def __init__(self, platform: Platform, base_region: str, strict_region: bool, send_status: Callable[dict, None], output: Callable[..., None]) -> None:
-		super().__init__(platform, base_region, strict_region, send_status, output)
+	def __init__(self, platform: Platform, base_region: str, strict_region: bool, send_status: Callable[dict, None], output: Callable[..., None], settings: dict = {}) -> None:
+		super().__init__(platform, base_region, strict_region, send_status, output, settings)
 
 	# Determines whether or not the given field is list type via LIST_TYPE_FIELD_PREFIXES.
 	def is_list_type_field(self, field: str) -> bool:
-		for prefix in LIST_TYPE_FIELD_PREFIXES:
-			if prefix in field:
-				return True
-		return False
-
-	# Helper method for read_existing_metadata.
-	# Adds the given data to the given field in data_section.
-	def add_data_to_field(self, data_section: dict, field: str, data: str) -> None:
-		# Check if this is a list type field
-		list_type_field = self.is_list_type_field(field)
-
-		# Check if field is already present
-		if field in data_section:
-			# Append data to field
-			if list_type_field:
-				data_section[field].append(data)
-			else:
-				data_section[field] += data
-		else:
-			if list_type_field:
-				if data == "":
-					data_section[field] = []
-				else:
-					data_section[field] = [data]
-			else:
-				data_section[field] = data
+		return field_is_list_type(field)
 
 	# Reads an existing metadata.pegasus.txt file.
 	# If this file is nonexistent, return None.
@@ -108,77 +126,71 @@ class PegasusExporter(Exporter):
 
 		self.output("Getting existing metadata...", 0)
 
-		# Read metadata file
-		metadata_lines = []
+		# Read metadata file, line by line
 		with open(existing_file, "r") as metadata_file:
-			# Get lines
-			metadata_lines_raw = metadata_file.readlines()
-
-			# Split file by blank lines
-			i = 0
-			current_field = ""
-			# NL: "New Line", consolidates consecutive blank lines to act as only one
-			nl = False
-			for line in metadata_lines_raw:
-				if line.strip(" ") == "\n":
-					# Check if this is a consecutive newline
-					if not nl:
-						# Queue creation of new data block
-						i += 1
-						current_field = ""
-						nl = True
-				elif line[0] != "#":
-					# This line is not a comment nor a blank line, therefore
-					# create a new data section
-					nl = False
-					if len(metadata_lines) == i:
-						metadata_lines.append({})
-
-					# Check if line contains field definition
-					contains_definition = re.match(r"\s", line) == None
-					if contains_definition:
-						# This line contains a field definition.
-						# Extract the field of this line. Throw an error if the field doesn't exist.
-						field = line[:line.index(":")].strip(" ")
-						# Extract the data of this line.
-						data = line[line.index(":") + 1:-1].strip(" ")
-
-						# Add the data to metadata_lines.
-						self.add_data_to_field(metadata_lines[i], field, data)
-						current_field = field
-					else:
-						# This line is a continuation of the data from the previous line.
-						new_data = line.strip(" ")[:-1]
-						if new_data == ".":
-							self.add_data_to_field(metadata_lines[i], current_field, "\n\n")
-						else:
-							self.add_data_to_field(metadata_lines[i], current_field, new_data)
+			metadata_lines = list(self.parse_metadata_blocks(metadata_file))
 
-		self.output(f"{metadata_lines}", -1)
+		self.output(f"Read {len(metadata_lines)} existing data blocks.", -1)
 		return metadata_lines
 
+	# Splits metadata.pegasus.txt lines into data blocks, as they are read.
+	# Blocks are separated by blank lines, and lines starting with # are comments.
+	# A line starting with whitespace continues the previous line's field: list type fields
+	# get one item per line, text fields are concatenated, with "." standing for a paragraph break.
+	# lines: The lines of the file, with or without their line breaks.
+	# return: An iterator over the data blocks.
+	def parse_metadata_blocks(self, lines: Iterable[str]) -> Iterator[dict]:
+		# Fields of the block being read: the items of list type fields, and the pieces
+		# of text fields, joined once the block ends
+		block: dict[str, list[str]] = {}
+		current_field = ""
+
+		for line in lines:
+			if line.endswith("\n"):
+				line = line[:-1]
+
+			if line.strip(" ") == "":
+				# Blank line, ending the block. Consecutive blank lines act as only one.
+				if len(block) > 0:
+					yield join_block(block)
+					block = {}
+				current_field = ""
+			elif line[0] != "#":
+				if not line[0].isspace():
+					# This line contains a field definition.
+					# Extract the field of this line. Throw an error if the field doesn't exist.
+					colon = line.index(":")
+					current_field = line[:colon].strip(" ")
+					data = line[colon + 1:].strip(" ")
+				else:
+					# This line is a continuation of the data from the previous line.
+					data = line.lstrip(" ")
+					if data == ".":
+						data = "\n\n"
+
+				values = block.get(current_field)
+				if values == None:
+					values = block[current_field] = []
+					# List type fields defined without data start empty
+					if data == "" and field_is_list_type(current_field):
+						continue
+				values.append(data)
+
+		if len(block) > 0:
+			yield join_block(block)
+
 	# Deletes any non-plural list-type fields from existing_entry, as listed in FIELD_PREFIX_TO_PLURAL.
 	# If any data was present in the non-plural field, move it to the plural equivalent.
 	def delete_non_plural_fields(self, existing_entry: dict) -> None:
-		fields_queued_for_deletion = []
-		for field_pfx in LIST_TYPE_FIELD_PREFIXES:
-			# Ignore file
-			if field_pfx != "file":
-				for field_name in existing_entry:
-					# Check if non-plural field name is in existing_entry
-					if field_pfx in field_name and not field_name in [*FIELD_PREFIX_TO_PLURAL.values()]:
-						# Non-plural list type found
-						field_plural = FIELD_PREFIX_TO_PLURAL[field_pfx]
-						# Add any items here to plural list type if not already present
-						for item in existing_entry[field_name]:
-							if not item in existing_entry[field_plural]:
-								existing_entry[field_plural].append(item)
-						# Queue non-plural field for deletion
-						fields_queued_for_deletion.append(field_name)
-
-		# Delete fields queued prior
-		for field in fields_queued_for_deletion:
-			del existing_entry[field]
+		for field_name in [field for field in existing_entry if plural_of_field(field) != None]:
+			# Add any items here to plural list type if not already present
+			plural_items = existing_entry.setdefault(plural_of_field(field_name), [])
+			present = set(plural_items)
+			for item in existing_entry[field_name]:
+				if not item in present:
+					plural_items.append(item)
+					present.add(item)
+			del existing_entry[field_name]
 
 	# Converts bsneo JSON metadata to a Pegasus metadata block.
 	# meta_json: The JSON data as read from the metadata file.
@@ -190,6 +202,7 @@ class PegasusExporter(Exporter):
 		# Remove Fields
 		for field in ("platform", "clean_name", "imgs"):
 			del meta_json[field]
+		meta_json.pop("matched_title", None)
 
 		# Rename Fields
 		for field in BSNEO_JSON_RENAME:
@@ -221,6 +234,28 @@ class PegasusExporter(Exporter):
 
 		return meta_block
 
+	# Exports a single game: its metadata, as read once from the metadata store, goes through
+	# region selection, media copy and block conversion.
+	# dest_dir: The directory holding the metadata.pegasus.txt file.
+	# return: The cleaned game name and the game's metadata block.
+	#   The name is cleaned from the game's title, like the names of existing blocks, so that a
+	#   game matched to a differently named file (e.g. by fuzzy matching) is found on merge.
+	def export_entry(self, metadata: dict, dest_dir: Path) -> tuple[str, dict]:
+		clean_game_name: str = str_to_clean(metadata.get("matched_title", metadata["clean_name"]))
+		to_copy = self.select_media(metadata["imgs"])
+		copied_media = self.copy_selected_media(metadata["clean_name"], to_copy, dest_dir)
+		return (clean_game_name, self.json_to_block(metadata, copied_media))
+
+	# Gets the media used by a series of metadata blocks.
+	# return: The paths of the media, relative to the metadata.pegasus.txt file.
+	def media_in_blocks(self, blocks: list[dict]) -> set[str]:
+		media = set()
+		for block in blocks:
+			for field in block:
+				if field.startswith("assets.") and type(block[field]) == str:
+					media.add(Path(block[field]).as_posix())
+		return media
+
 	# Converts a series of metadata blocks to metadata.pegasus.txt format.
 	# return: The output in metadata.pegasus.txt format as a list of lines
 	def blocks_to_file(self, blocks: list[dict]) -> list[str]:
@@ -269,25 +304,27 @@ class PegasusExporter(Exporter):
 			self.output("Destination path is a directory!", 1)
 			return []
 
-		exported = []
-
 		# Get existing data
 		existing_meta: list[dict] = self.read_existing_metadata(dest)
 		if existing_meta == None:
 			# No existing data
 			self.output("No existing data found.", 0)
 
+			self.open_manifest(dest.parent)
+			self.start_media_copy()
+
 			meta_blocks = []
 			game_names = []
-			for meta_file in PATH_META(self.platform.pid).iterdir():
-				# Record that this game is in the metadata file
-				game_names.append(str_to_clean(meta_file.name[:-5]))
-				# Copy over media for this game to destination folder
-				copied_media = self.copy_media(meta_file, dest.parent)
-				with open(meta_file, "r") as meta_file_content:
-					# Read metadata file and convert to block
-					metadata = json.loads(meta_file_content.read())
-					meta_blocks.append(self.json_to_block(metadata, copied_media))
+			try:
+				for metadata in self.meta_store.entries():
+					# Copy over media for this game to destination folder and convert metadata to block
+					clean_game_name, metadata_block = self.export_entry(metadata, dest.parent)
+					# Record that this game is in the metadata file
+					game_names.append(clean_game_name)
+					meta_blocks.append(metadata_block)
+			finally:
+				# Wait for the media, even if a game could not be converted
+				self.finish_media_copy()
 
 			# Create collection data block and insert
 			collection_block = {
@@ -303,6 +340,9 @@ class PegasusExporter(Exporter):
 			with open(dest, "w") as dest_file:
 				dest_file.writelines(output_lines)
 
+			# Only once the file no longer refers to them, remove media of games which are not exported anymore
+			self.close_manifest(self.media_in_blocks(meta_blocks))
+
 			return game_names
 		else:
 			# There is existing data
@@ -311,30 +351,32 @@ class PegasusExporter(Exporter):
 				self.output("Existing Data Found! Integrating any new data...", 0)
 
 				# Existing data is for the same system
-				# Get cleaned names of existing games
+				# Get cleaned names of existing games, and index their blocks by cleaned name
 				existing_game_names = []
-				for game_entry in existing_meta[1:]:
-					existing_game_names.append(str_to_clean(game_entry["game"]))
+				existing_game_index: dict[str, int] = {}
+				for block_idx in range(1, len(existing_meta)):
+					existing_game_name = str_to_clean(existing_meta[block_idx]["game"])
+					existing_game_names.append(existing_game_name)
+					existing_game_index.setdefault(existing_game_name, block_idx)
 
 				self.output(f"Existing: {existing_game_names}", -1)
 
-				# Add any non-preexisting games
-				for meta_file in PATH_META(self.platform.pid).iterdir():
-					# Check if this game is already in the metadata file.
-					clean_game_name: str = str_to_clean(meta_file.name[:-5])
-					self.output(f"Checking if {clean_game_name} is already present...", -1)
+				self.open_manifest(dest.parent)
+				self.start_media_copy()
 
-					# Overwrite any already present media & copy any new media
-					copied_media = self.copy_media(meta_file, dest.parent)
-					with open(meta_file, "r") as meta_file_content:
-						# Get metadata
-						metadata = json.loads(meta_file_content.read())
-						metadata_block = self.json_to_block(metadata, copied_media)
+				try:
+					# Add any non-preexisting games
+					for metadata in self.meta_store.entries():
+						# Overwrite any already present media & copy any new media
+						clean_game_name, metadata_block = self.export_entry(metadata, dest.parent)
 
-						if clean_game_name in existing_game_names:
+						# Check if this game is already in the metadata file.
+						self.output(f"Checking if {clean_game_name} is already present...", -1)
+
+						existing_entry_idx: int = existing_game_index.get(clean_game_name)
+						if existing_entry_idx != None:
 							# This game is already in the metadata file.
 							self.output(f"Already present, substituting fields...", -1)
-							existing_entry_idx: int = existing_game_names.index(clean_game_name) + 1
 
 							# Replace fields
 							for field in metadata_block:
@@ -347,6 +389,10 @@ class PegasusExporter(Exporter):
 							self.output(f"Not present, adding...", -1)
 							existing_meta.append(metadata_block)
 							existing_game_names.append(clean_game_name)
+							existing_game_index[clean_game_name] = len(existing_meta) - 1
+				finally:
+					# Wait for the media, even if a game could not be converted
+					self.finish_media_copy()
 
 				# Convert to correct format and write output
 				self.output("Writing data to file...", 0)
@@ -354,6 +400,9 @@ class PegasusExporter(Exporter):
 				with open(dest, "w") as dest_file:
 					dest_file.writelines(output_lines)
 
+				# Only once the file no longer refers to them, remove media of games which are not exported anymore
+				self.close_manifest(self.media_in_blocks(existing_meta))
+
 				return existing_game_names
 			else:
 				self.output("Destination file holds metadata for a different system.", 1)
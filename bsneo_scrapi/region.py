@@ -60,3 +60,17 @@ def get_preferred_regions(region_code: str) -> list[str]:
 
 	return prefs
 
+
+# Orders images by region preference, in the order an exporter should choose them.
+# regions: The region code of each image.
+# pref_reg: The preferred regions, as returned by get_preferred_regions.
+# strict: If True, images outside of pref_reg are left out.
+# return: The indices of the images, best first. Images of equal priority keep their order.
+def rank_by_region(regions: list[str], pref_reg: list[str], strict: bool = False) -> list[int]:
+	ranked = [i for i in range(len(regions)) if regions[i] in pref_reg]
+	ranked.sort(key = lambda i: pref_reg.index(regions[i]))
+
+	if not strict:
+		ranked += [i for i in range(len(regions)) if not regions[i] in pref_reg]
+
+	return ranked
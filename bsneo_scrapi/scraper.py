@@ -1,8 +1,11 @@
 from pathlib import Path
 from typing import Callable
+import threading
 
 from .paths import check_base_path
 from .platform import Platform
+from .http_client import HTTPClient
+from .journal import ScrapeJournal
 
 #
 # Scraper
@@ -28,19 +31,47 @@ class Scraper():
 	# Status update function
 	send_status: Callable[dict, None] = None
 
+	# Optional worker settings, read with options.get_option
+	settings: dict = {}
+
+	# HTTP client used for every request
+	http: HTTPClient = None
+
+	# Journal recording the progress of scrape(), if any
+	journal: ScrapeJournal = None
+
+	# Short string representing the scraper service, written to each entry's "scraped_with"
+	scraped_with: str = ""
+
 	# Assign values
-	def __init__(self, files: list[Path], platform: Platform, rescrape_existing: bool, send_status: Callable[dict, None], output: Callable[..., None]) -> None:
+	# http: The worker's shared HTTP client. If None, the scraper creates its own.
+	# journal: The platform's scrape journal, used to resume an interrupted run. Optional.
+	def __init__(self, files: list[Path], platform: Platform, rescrape_existing: bool, send_status: Callable[dict, None], output: Callable[..., None], settings: dict = {}, http: HTTPClient = None, journal: ScrapeJournal = None) -> None:
 		self.platform = platform
 		self.rescrape_existing = rescrape_existing
+		self.settings = settings
+		self.journal = journal
+
+		self.http = http
+		if self.http == None:
+			self.http = HTTPClient(self.FETCH_TIMEOUT, self.FETCH_TIMEOUT)
 
 		self.files = files
 
 		self.send_status = send_status
 		self.output = output
 
+		# Set by stop() to end a running scrape() early
+		self.stopping = threading.Event()
+
 		# Check if base path exists. Other path checks will occur at their respective stages.
 		check_base_path()
 
+	# Ask a running scrape() to stop as soon as possible. Safe to call from any thread.
+	# Entries passed on so far are kept.
+	def stop(self) -> None:
+		self.stopping.set()
+
 	# SKELETON METHOD:
 	# Get the page with the game's metadata
 	# return: A string with the contents of the page.
@@ -64,5 +95,7 @@ class Scraper():
 	#      The first item a URL to the image, while the second item is the item's region.
 	#      "video": video is an external URL to the video, not a filepath to a local file.
 	#   2. "scraped_with": A short string representing the scraper service used for the entries.
-	def scrape(self) -> dict:
+	# on_entry: If given, each entry is passed to this function as soon as it is scraped,
+	#   instead of being added to "entries". See EntryStream.
+	def scrape(self, on_entry: Callable[dict, None] = None) -> dict:
 		return {}
@@ -0,0 +1,34 @@
+import threading, time
+
+#
+# Throttle
+# Thread-safe rate limiter for requests sent to a single service
+#
+
+class Throttle():
+	# Minimum number of seconds between the start of two requests (0 disables throttling)
+	interval: float = 0.0
+
+	# rate: The maximum number of requests per second. 0 or less disables throttling.
+	def __init__(self, rate: float) -> None:
+		if rate > 0:
+			self.interval = 1.0 / rate
+
+		# Time at which the next request may start
+		self.next_slot: float = 0.0
+		self.lock = threading.Lock()
+
+	# Block the calling thread until it is allowed to send its request.
+	def wait(self) -> None:
+		if self.interval == 0.0:
+			return
+
+		# Reserve the next free slot
+		with self.lock:
+			now = time.monotonic()
+			slot = max(now, self.next_slot)
+			self.next_slot = slot + self.interval
+
+		# Sleep until the reserved slot
+		if slot > now:
+			time.sleep(slot - now)
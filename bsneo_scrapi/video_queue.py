@@ -0,0 +1,68 @@
+from pathlib import Path
+import os, json, threading
+
+from .paths import *
+
+#
+# VideoQueue
+# Persistent per-platform queue of videos waiting to be downloaded.
+# Videos left in the queue when the app closes are downloaded on the next run.
+#
+
+class VideoQueue():
+	def __init__(self, pid: str) -> None:
+		self.path: Path = PATH_SYS(pid).joinpath("video_queue.json")
+		self.condition = threading.Condition()
+
+		# Queued videos, oldest first, as {"clean_name": ..., "link": ...}
+		self.videos: list[dict] = []
+		if self.path.exists():
+			try:
+				with open(self.path, "r") as queue_file:
+					self.videos = json.loads(queue_file.read())
+			except (OSError, ValueError):
+				self.videos = []
+
+		# Whether more videos may be pushed. next() waits for them until the queue is closed.
+		self.closed: bool = False
+
+	# Write the queue to its file. Must be called with the condition held.
+	def save(self) -> None:
+		check_path(self.path.parent)
+		temp_path = self.path.with_name(self.path.name + ".part")
+		with open(temp_path, "w") as queue_file:
+			queue_file.write(json.dumps(self.videos))
+		os.replace(temp_path, self.path)
+
+	# Queue the video of an entry, replacing any video already queued for it.
+	def push(self, clean_name: str, link: str) -> None:
+		with self.condition:
+			self.videos = [video for video in self.videos if video["clean_name"] != clean_name]
+			self.videos.append({"clean_name": clean_name, "link": link})
+			self.save()
+			self.condition.notify()
+
+	# Get the oldest queued video without removing it, waiting for one if the queue is empty.
+	# return: The video, or None once the queue is empty and closed.
+	def next(self) -> dict:
+		with self.condition:
+			while len(self.videos) == 0 and not self.closed:
+				self.condition.wait()
+			return self.videos[0] if len(self.videos) > 0 else None
+
+	# Remove the video of an entry from the queue.
+	def done(self, clean_name: str) -> None:
+		with self.condition:
+			self.videos = [video for video in self.videos if video["clean_name"] != clean_name]
+			self.save()
+
+	# Mark that no more videos will be pushed, waking up a waiting next().
+	def close(self) -> None:
+		with self.condition:
+			self.closed = True
+			self.condition.notify_all()
+
+	# Get the number of queued videos.
+	def __len__(self) -> int:
+		with self.condition:
+			return len(self.videos)
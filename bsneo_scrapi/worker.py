@@ -4,13 +4,19 @@ import threading
 
 from .region import REGIONS
 from .platform import *
+from .options import get_option
+from .http_client import HTTPClient, HTTP_POOL_SIZE
 
 # Scrapers
 from .scraper import Scraper
 from .lbscraper import LBScraper
 
 # Info Compiler
-from .info_compiler import InfoCompiler
+from .info_compiler import InfoCompiler, MEDIA_NETWORK_TIMEOUT
+from .async_media import AsyncInfoCompiler
+from .media_store import MediaStore
+from .journal import ScrapeJournal
+from .entry_stream import EntryStream, ENTRY_QUEUE_SIZE
 
 # Exporters
 from .exporter import Exporter
@@ -42,6 +48,18 @@ class Worker():
 	# The exporter class instance for this worker.
 	exporter: Exporter = None
 
+	# HTTP client shared by the scraper and the info compiler.
+	http: HTTPClient = None
+
+	# The info compiler downloading media in run(), if any.
+	info_compiler: InfoCompiler = None
+
+	# Journal of the platform's scrape runs, used to resume an interrupted run.
+	journal: ScrapeJournal = None
+
+	# The stream of entries from the scraper to the info compiler in run(), if any.
+	stream: EntryStream = None
+
 	# Initialize output wrapper for output to be sent over to the main application.
 	def __init__(self, output_wrapper: Callable[..., None], on_status_change: Callable[..., None]=lambda *args: None) -> None:
 		self.output_wrapper = output_wrapper
@@ -52,6 +70,7 @@ class Worker():
 
 		# Current Status
 		self.status: dict = {}
+		self.status_lock = threading.RLock()
 
 	# Set or override options that the scraper or exporter can use.
 	def set_worker_settings(self, opts: dict) -> None:
@@ -62,6 +81,25 @@ class Worker():
 	def set_worker_files(self, files: list[Path]) -> None:
 		self.files = files
 
+	# Get the HTTP client shared by this worker's tasks, creating it on first use.
+	def get_http_client(self) -> HTTPClient:
+		if self.http == None:
+			self.http = HTTPClient(
+				Scraper.FETCH_TIMEOUT,
+				MEDIA_NETWORK_TIMEOUT,
+				get_option(self.settings, "http_pool_size", HTTP_POOL_SIZE)
+			)
+		return self.http
+
+	# Get the scrape journal of the current platform, creating it on first use.
+	# return: The journal, or None if the scrape_journal setting is False.
+	def get_journal(self) -> ScrapeJournal:
+		if not get_option(self.settings, "scrape_journal", True):
+			return None
+		if self.journal == None:
+			self.journal = ScrapeJournal(self.platform.pid)
+		return self.journal
+
 	# Set the destination file for exporting.
 	def set_worker_export_dest(self, dest: Path) -> None:
 		self.export_dest = dest
@@ -71,6 +109,7 @@ class Worker():
 	def set_platform(self, pid: str) -> bool:
 		if pid in PLATFORMS:
 			self.platform = PLATFORMS[pid]
+			self.journal = None
 			return True
 		return False
 
@@ -102,7 +141,7 @@ class Worker():
 					return ["files"]
 
 				# Set Scraper
-				self.scraper = LBScraper(self.files, self.platform, self.settings["rescrape_existing"], self.update_status, self.output_wrapper)
+				self.scraper = LBScraper(self.files, self.platform, self.settings["rescrape_existing"], self.update_status, self.output_wrapper, self.settings, self.get_http_client(), self.get_journal())
 			case _:
 				return ["scraper_id"]
 
@@ -137,17 +176,19 @@ class Worker():
 		match exporter_id:
 			case "pf":
 				# Set Exporter
-				self.exporter = PegasusExporter(self.platform, self.settings["region"], self.settings["strict_region"], self.update_status, self.output_wrapper)
+				self.exporter = PegasusExporter(self.platform, self.settings["region"], self.settings["strict_region"], self.update_status, self.output_wrapper, self.settings)
 			case _:
 				return ["exporter_id"]
 
 		return []
 
 	# Sends a new status to the class using this worker.
+	# Safe to call from the scraper's and the info compiler's threads.
 	def update_status(self, status: dict) -> None:
-		for key in status:
-			self.status[key] = status[key]
-		self.on_status_change(self.status)
+		with self.status_lock:
+			for key in status:
+				self.status[key] = status[key]
+			self.on_status_change(self.status)
 
 	# Scrape the specified games and save the data.
 	def run(self) -> None:
@@ -157,22 +198,79 @@ class Worker():
 				"Please specify a scraper before attempting to run a scrape task."
 			)
 
-		# Scrape
-		scraped_data: dict = self.scraper.scrape()
+		# A scraper stopped by an earlier run may scrape again
+		self.scraper.stopping.clear()
+
+		# Initialize InfoCompiler
+		download_video = False
+		if "video_dl" in self.settings and type(self.settings["video_dl"]) == bool:
+			download_video = self.settings["video_dl"]
+
+		# Select the media engine ("threaded" or "async")
+		if get_option(self.settings, "media_engine", "threaded") == "async":
+			self.info_compiler = AsyncInfoCompiler(self.platform, download_video, self.update_status, self.output_wrapper, self.settings, self.get_http_client(), self.scraper.journal)
+		else:
+			self.info_compiler = InfoCompiler(self.platform, download_video, self.update_status, self.output_wrapper, self.settings, self.get_http_client(), self.scraper.journal)
+
+		if get_option(self.settings, "stream_entries", True):
+			# Scrape and compile at the same time: media is downloaded while the search continues
+			stream = EntryStream(self.scraper, get_option(self.settings, "entry_queue_size", ENTRY_QUEUE_SIZE))
+			self.stream = stream
+			stream.start()
+			try:
+				self.info_compiler.process({"entries": stream, "scraped_with": self.scraper.scraped_with})
+			finally:
+				stream.close()
+				self.stream = None
+			scraped_data: dict = stream.result
+
+			# Stop if an error occurred while scraping. The entries found until then were compiled.
+			if scraped_data == None or scraped_data["error"]:
+				return
+		else:
+			# Scrape
+			scraped_data: dict = self.scraper.scrape()
+
+			# Check if an error occurred while scraping
+			if scraped_data["error"]:
+				return
 
-		# Check if an error occurred while scraping
-		if not scraped_data["error"]:
 			# No Error Occurred, continue as normal.
-			# Initialize InfoCompiler
-			download_video = False
-			if "video_dl" in self.settings and type(self.settings["video_dl"]) == bool:
-				download_video = self.settings["video_dl"]
-
-			info_compiler: InfoCompiler = InfoCompiler(self.platform, download_video, self.update_status, self.output_wrapper)
-
 			# Compile Information
-			info_compiler.process(scraped_data)
-			self.update_status({"code": "finished", "details": "Nothing Left to Do"})
+			self.info_compiler.process(scraped_data)
+
+		# Every entry was written, nothing is left to resume
+		if self.scraper.journal != None and not self.info_compiler.cancelled:
+			self.scraper.journal.clear()
+
+		# Finished once the queued videos and deferred media are downloaded too
+		self.info_compiler.finish_when_idle({"code": "finished", "details": "Nothing Left to Do"})
+
+	# Stop the scrape of a running run() call, cancel its media downloads if its media engine
+	# supports it, and stop any deferred media downloads.
+	def cancel(self) -> None:
+		# Closing the stream stops the crawl and wakes up the info compiler waiting for entries
+		stream = self.stream
+		if stream != None:
+			stream.close()
+		elif self.scraper != None:
+			self.scraper.stop()
+
+		info_compiler = self.info_compiler
+		if info_compiler != None:
+			info_compiler.cancel()
+
+	# Remove the media store's files which no platform uses anymore.
+	# Nothing is removed while any worker of this process is downloading media.
+	# return: The number of files removed and the bytes freed, or None if media is being downloaded.
+	def clean_media_store(self) -> tuple[int, int]:
+		result = MediaStore().collect_garbage()
+		if result == None:
+			self.output_wrapper("Media is being downloaded, not cleaning the media store.", 1)
+		else:
+			removed, freed = result
+			self.output_wrapper(f"Removed {removed} Unused Media Files ({freed / (1024 * 1024):.1f} MB).", 0)
+		return result
 
 	# Export saved metadata.
 	def export(self) -> None:
@@ -38,7 +38,8 @@ class ExportConsoleListTile(DropdownListTile):
 
 		# Get names of systems and add to dropdown menu
 		for system_dir in PATH_BASE.iterdir():
-			if system_dir.is_dir():
+			# Skip folders which are not a platform's
+			if system_dir.is_dir() and system_dir.name in PLATFORMS:
 				print(f"System available for Export: {system_dir.name}")
 				system_longname = PLATFORMS[system_dir.name].fullname
 				systems.append(ft.dropdown.Option(key=system_dir.name, text=system_longname))
@@ -154,6 +155,17 @@ class ExportScreen(ft.SafeArea):
 		# Refresh Page
 		ExportScreen.update(None)
 
+	# Show the progress of the media copy of a running export in the status label
+	def update_copy_status(status: dict):
+		copied_mb = status["copy_bytes"] / (1024 * 1024)
+		msg = f"Copying Media: {status['copy_done']}/{status['copy_total']} Files ({copied_mb:.1f} MB), {status['copy_rate']:.1f} Files/s"
+		if status["copy_eta"] >= 0:
+			msg += f", {int(status['copy_eta'])}s Left"
+		ExportScreen.export_status.value = msg
+
+		# Refresh Page
+		ExportScreen.update(None)
+
 	def __init__(self, update, run_export):
 		# Set Page Refresh Function
 		ExportScreen.update = update
@@ -29,6 +29,9 @@ def main(page: ft.Page):
 		if status["code"] == "finished":
 			page.overlay.append(ft.SnackBar(ft.Text(f"Export Finished."), open=True))
 			page.update()
+		elif status["code"] == "export":
+			# Media copy progress
+			ExportScreen.update_copy_status(status)
 
 	def run_export(export_options):
 		# Load Settings
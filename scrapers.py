@@ -24,6 +24,7 @@ STATUS_CODE_CONV = {
 	"get": "Scraping Game Pages",
 	"image": "Downloading Images",
 	"video": "Downloading Video",
+	"export": "Exporting Media",
 	"finished": "Finished",
 	"error": "Error"
 }
@@ -90,7 +91,7 @@ class ScraperScreen(ft.ListView):
 			confirm_dialog = ft.AlertDialog(
 				modal=True,
 				title=ft.Text("Are You Sure?"),
-				content=ft.Text("If you cancel scraping now, the scraped data may not be saved."),
+				content=ft.Text("If you cancel scraping now, the remaining games will only be scraped the next time this platform is scraped."),
 				actions=[
 					ft.TextButton("Yes", on_click=close_dialog),
 					ft.TextButton("No", on_click=close_dialog),
@@ -104,7 +105,7 @@ class ScraperScreen(ft.ListView):
 	# Updates the status values shown on screen.
 	def update_status(self, status: dict) -> None:
 		# Update Status Label
-		self.status_label.value = f"Current Status: {STATUS_CODE_CONV[status['code']]}"
+		self.status_label.value = f"Current Status: {STATUS_CODE_CONV[status.get('code', 'idle')]}"
 		if "details" in status:
 			self.status_details_label.value = status['details']
 
@@ -183,7 +184,7 @@ class ScraperScreen(ft.ListView):
 
 		# Current Status and status details UI Definitions
 		self.status_label = ft.Text(
-			f"Current Status: {STATUS_CODE_CONV[self.scraper.worker.status['code']]}",
+			f"Current Status: {STATUS_CODE_CONV[self.scraper.worker.status.get('code', 'idle')]}",
 			size=20,
 		)
 		self.status_details_label = ft.Text(
@@ -413,8 +414,8 @@ class ScraperList(ft.ListView):
 
 		# Update List Entry
 		list_entry = self.get_scraper_entry(scraper_id)
-		list_entry.set_status(STATUS_CODE_CONV[status["code"]])
-		match status["code"]:
+		list_entry.set_status(STATUS_CODE_CONV[status.get("code", "idle")])
+		match status.get("code", "idle"):
 			# Update first half of bar: Search Progress
 			case "search" | "get":
 				if "to_scrape_total" in status:
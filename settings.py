@@ -5,6 +5,7 @@ import flet as ft
 
 from bsneo_scrapi.paths import PATH_CONFIG, check_config_path
 from bsneo_scrapi.region import REGIONS
+from bsneo_scrapi.worker import Worker
 
 from util import DropdownListTile
 
@@ -92,6 +93,21 @@ class SettingsScreen(ft.SafeArea):
 		with open(PATH_CONFIG, "w") as cfg_file:
 			cfg_file.write(json.dumps(SettingContainer.get_all_settings()))
 
+	# Remove downloaded media which no scraped game uses anymore
+	def clean_media_store(self, e):
+		def clean_worker_output(msg: str, level: int):
+			if level == -1:
+				print(f"[DEBUG] ", end="")
+			print(f"CLEAN: {msg}")
+
+		result = Worker(clean_worker_output).clean_media_store()
+		if result == None:
+			msg = "Media is being downloaded. Try again once every scraper has finished."
+		else:
+			msg = f"Removed {result[0]} Unused Media Files ({result[1] / (1024 * 1024):.1f} MB)."
+		e.page.overlay.append(ft.SnackBar(ft.Text(msg), open=True))
+		e.page.update()
+
 	def __init__(self):
 		# Load settings from file
 		load_settings()
@@ -126,6 +142,18 @@ class SettingsScreen(ft.SafeArea):
 			),
 			#Setting("list", "region", "Region", ft.icons.PUBLIC, {"list": REGIONS}),
 			Setting("bool", "strict_region", "Strict Region Filter", ft.icons.LOCK),
+			ft.Divider(),
+
+			# Storage
+			ft.Text(
+				"Storage",
+				size=20,
+			),
+			ft.ListTile(
+				leading=ft.Icon(ft.icons.CLEANING_SERVICES),
+				title=ft.Text("Clean Unused Media"),
+				on_click=self.clean_media_store,
+			),
 		],
 		spacing = 8,
 		padding = ft.padding.symmetric(horizontal=4),